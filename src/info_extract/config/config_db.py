@@ -3,24 +3,62 @@ Configuration database interface for info_extract project.
 Provides methods to access configuration data stored in the standard.db SQLite database.
 """
 import sqlite3
+import threading
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
 
 from .config_models import InfoItem, Example, ExtractionRecord, ExtractionAttribute
 from langextract.data import Extraction
 
 
+# Per-connection tuning. journal_mode=WAL is persisted in the database file,
+# so it is only set once when the ConfigDB is created.
+_CONNECTION_PRAGMAS = """
+    PRAGMA synchronous=NORMAL;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA cache_size=-64000;
+    PRAGMA mmap_size=268435456;
+"""
+
+# Room for every distinct statement in this module, so the prepared
+# statements of a long-lived connection are never evicted.
+_STATEMENT_CACHE_SIZE = 256
+
 class ConfigDB:
     """Interface to access configuration data from the standard.db SQLite database."""
 
+    # Database files already switched to WAL in this process
+    _wal_enabled: set[Path] = set()
+
+    # Write counters per database, shared by every ConfigDB opened on it in this process
+    _versions: Dict[str, int] = {}
+    _versions_lock = threading.Lock()
+
     def __init__(self, db_path: Optional[str] = None, active_profile_id: int = 1):
         """
         Initialize the ConfigDB instance.
 
         Args:
             db_path: Path to the SQLite database. If None, uses default path.
+                A shared-cache in-memory URI ("file:name?mode=memory&cache=shared")
+                is also accepted; the caller keeps one connection to it open so the
+                database outlives the connections opened here.
             active_profile_id: ID of the profile to use for queries. Default is 1 (default profile).
         """
+        self.active_profile_id = active_profile_id
+
+        # One long-lived connection per thread, so the page cache and pragmas
+        # survive across calls. UI handlers run on Starlette's threadpool.
+        self._local = threading.local()
+
+        self.memory_uri: Optional[str] = None
+        if db_path is not None and db_path.startswith("file:") and "mode=memory" in db_path:
+            # No file, no WAL: every connection opens the same named in-memory database
+            self.memory_uri = db_path
+            self.db_path = Path(db_path)
+            self._version_key = db_path
+            return
+
         if db_path is None:
             # Default to the standard.db in the config directory
             project_root = Path(__file__).parent.parent.parent
@@ -30,8 +68,78 @@ class ConfigDB:
 
         if not self.db_path.exists():
             raise FileNotFoundError(f"Configuration database not found at {self.db_path}")
-        
-        self.active_profile_id = active_profile_id
+
+        # WAL lets the UI read while the pipeline writes. The mode is stored in the
+        # file, so one switch per process is enough however many ConfigDBs open it.
+        wal_key = self.db_path.resolve()
+        self._version_key = str(wal_key)
+        if wal_key not in ConfigDB._wal_enabled:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                conn.execute("PRAGMA journal_mode=WAL")
+            finally:
+                conn.close()
+            ConfigDB._wal_enabled.add(wal_key)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Get this thread's connection, opening it with the performance pragmas on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            if self.memory_uri is not None:
+                conn = sqlite3.connect(self.memory_uri, uri=True, cached_statements=_STATEMENT_CACHE_SIZE)
+            else:
+                conn = sqlite3.connect(self.db_path, cached_statements=_STATEMENT_CACHE_SIZE)
+            conn.executescript(_CONNECTION_PRAGMAS)
+            self._local.conn = conn
+        return conn
+
+    def _connect_readonly(self) -> sqlite3.Connection:
+        """Get this thread's read-only connection, used by the listing queries.
+
+        Under WAL a reader never takes the write lock, so listings do not
+        contend with the admin writes going through _connect().
+        An in-memory database has no WAL, so it is read through _connect() as well.
+        """
+        if self.memory_uri is not None:
+            return self._connect()
+        conn = getattr(self._local, "ro_conn", None)
+        if conn is None:
+            conn = sqlite3.connect(f"{self.db_path.resolve().as_uri()}?mode=ro", uri=True,
+                                   cached_statements=_STATEMENT_CACHE_SIZE)
+            conn.executescript(_CONNECTION_PRAGMAS)
+            conn.execute("PRAGMA query_only=1")
+            self._local.ro_conn = conn
+        return conn
+
+    @property
+    def version(self) -> int:
+        """Bumped whenever a ConfigDB in this process commits changes to this database;
+        lets callers cache data derived from the database until the next write.
+        """
+        return ConfigDB._versions.get(self._version_key, 0)
+
+    def _bump_version(self):
+        with ConfigDB._versions_lock:
+            ConfigDB._versions[self._version_key] = ConfigDB._versions.get(self._version_key, 0) + 1
+
+    def _release(self, conn: sqlite3.Connection):
+        """Finish using a connection, discarding any transaction left uncommitted."""
+        if conn.in_transaction:
+            conn.rollback()
+        elif conn is getattr(self._local, "conn", None):
+            changes = conn.total_changes
+            if changes != getattr(self._local, "total_changes", 0):
+                self._local.total_changes = changes
+                self._bump_version()
+
+    def close(self):
+        """Close this thread's connections."""
+        for name in ("conn", "ro_conn"):
+            conn = getattr(self._local, name, None)
+            if conn is not None:
+                conn.close()
+                setattr(self._local, name, None)
+        self._local.total_changes = 0
     
     
     def get_info_items(self) -> List[InfoItem]:
@@ -43,7 +151,7 @@ class ConfigDB:
         """
         conn = None
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect_readonly()
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             cursor.execute("""
@@ -70,7 +178,33 @@ class ConfigDB:
             ]
         finally:
             if conn:
-                conn.close()
+                self._release(conn)
+    
+    
+    def get_info_item_rows(self) -> List[Tuple]:
+        """
+        Get the information items of the active profile as plain tuples, for listing.
+
+        Returns:
+            List of (id, label, describe, data_type, sort_no, sample_col_name) tuples
+        """
+        conn = None
+        try:
+            conn = self._connect_readonly()
+            cursor = conn.cursor()
+            # Skip sqlite3.Row / InfoItem hydration, the rows are serialized as-is
+            cursor.row_factory = None
+            cursor.execute("""
+                SELECT
+                    id, label, describe, data_type, sort_no, sample_col_name
+                FROM info_item
+                WHERE profile_id = ?
+                ORDER BY sort_no
+            """, (self.active_profile_id,))
+            return cursor.fetchall()
+        finally:
+            if conn:
+                self._release(conn)
     
     
     def get_examples(self) -> List[Example]:
@@ -82,7 +216,7 @@ class ConfigDB:
         """
         conn = None
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             cursor.execute("SELECT id, fragment, profile_id FROM example WHERE profile_id = ?", (self.active_profile_id,))
@@ -99,7 +233,7 @@ class ConfigDB:
             return data
         finally:
             if conn:
-                conn.close()
+                self._release(conn)
 
 
     def get_extractions_by_example_id(self, example_id: int) -> List[Tuple[int, Extraction]]:
@@ -114,7 +248,7 @@ class ConfigDB:
         """
         conn = None
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             cursor.execute("""
@@ -143,7 +277,7 @@ class ConfigDB:
             return data
         finally:
             if conn:
-                conn.close()
+                self._release(conn)
 
 
     def get_attributes_by_extraction_id(self, extraction_id:int) -> dict[str, str] | None:
@@ -158,7 +292,7 @@ class ConfigDB:
         """
         conn = None
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             cursor.execute("""
@@ -179,7 +313,7 @@ class ConfigDB:
             return attributes
         finally:
             if conn:
-                conn.close()
+                self._release(conn)
 
     def get_mapping_sql_by_hash_key(self, hash_key:str) -> str|None:
         """
@@ -193,7 +327,7 @@ class ConfigDB:
         """
         conn = None
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             cursor.execute("""
@@ -209,7 +343,7 @@ class ConfigDB:
                 return row["sql_code"]
         finally:
             if conn:
-                conn.close()
+                self._release(conn)
 
     def save_mapping_sql(self, hash_key:str, sql_code:str):
         """
@@ -221,19 +355,19 @@ class ConfigDB:
         """
         conn = None
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             conn.execute("""
             INSERT INTO mapping_cache (hash_key, sql_code) values (?, ?)
             """,  (hash_key, sql_code,))
             conn.commit()
         finally:
             if conn:
-                conn.close()
+                self._release(conn)
 
     def add_item(self, new_item: InfoItem) -> int:
         conn = None
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
 
             cursor.execute("""
@@ -253,12 +387,42 @@ class ConfigDB:
             return new_id # type: ignore
         finally:
             if conn:
-                conn.close()
+                self._release(conn)
+
+    def add_items(self, new_items: Sequence[InfoItem]) -> List[int]:
+        """Insert several info items in one transaction, returning their ids in order."""
+        conn = None
+        try:
+            conn = self._connect()
+            cursor = conn.cursor()
+
+            # executemany leaves lastrowid unset, so run the cached statement per row
+            # and commit once
+            new_ids = []
+            for new_item in new_items:
+                cursor.execute("""
+                    INSERT INTO info_item (label, describe, data_type, sort_no, sample_col_name, profile_id)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, (
+                    new_item.label,
+                    new_item.describe,
+                    new_item.data_type,
+                    new_item.sort_no,
+                    new_item.sample_col_name,
+                    self.active_profile_id
+                ))
+                new_ids.append(cursor.lastrowid)
+
+            conn.commit()
+            return new_ids # type: ignore
+        finally:
+            if conn:
+                self._release(conn)
 
     def update_item(self, item: InfoItem):
         conn = None
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
 
             cursor.execute("""
@@ -281,19 +445,18 @@ class ConfigDB:
             return 1
         finally:
             if conn:
-                conn.close()
+                self._release(conn)
 
     def update_items_sort(self, item_orders: List[Dict[str, int]]):
         conn = None
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
 
-            for item in item_orders:
-                cursor.execute(
-                    "UPDATE info_item SET sort_no=? WHERE id=? AND profile_id=?",
-                    (item['sort_no'], item['id'], self.active_profile_id)
-                )
+            cursor.executemany(
+                "UPDATE info_item SET sort_no=? WHERE id=? AND profile_id=?",
+                [(item['sort_no'], item['id'], self.active_profile_id) for item in item_orders]
+            )
 
             if cursor.rowcount == 0:
                 return 0
@@ -301,12 +464,12 @@ class ConfigDB:
             return 1
         finally:
             if conn:
-                conn.close()
+                self._release(conn)
 
     def delete_item(self, item_id:int):
         conn = None
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
 
             cursor.execute("DELETE FROM info_item WHERE id=? AND profile_id=?", (item_id, self.active_profile_id))
@@ -317,7 +480,7 @@ class ConfigDB:
             return 1
         finally:
             if conn:
-                conn.close()
+                self._release(conn)
 
     def get_available_profiles(self):
         """
@@ -328,7 +491,7 @@ class ConfigDB:
         """
         conn = None
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             cursor.execute("SELECT id, name, description, is_default FROM profile ORDER BY name")
@@ -336,7 +499,7 @@ class ConfigDB:
             return [dict(row) for row in rows]
         finally:
             if conn:
-                conn.close()
+                self._release(conn)
 
     def get_profile_by_id(self, profile_id: int):
         """
@@ -350,7 +513,7 @@ class ConfigDB:
         """
         conn = None
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             cursor.execute("SELECT id, name, description, is_default FROM profile WHERE id = ?", (profile_id,))
@@ -358,7 +521,7 @@ class ConfigDB:
             return dict(row) if row else None
         finally:
             if conn:
-                conn.close()
+                self._release(conn)
 
     def create_profile(self, name: str, description: str | None = None) -> int:
         """
@@ -373,7 +536,7 @@ class ConfigDB:
         """
         conn = None
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
             cursor.execute("""
                 INSERT INTO profile (name, description, is_default)
@@ -384,7 +547,7 @@ class ConfigDB:
             return new_id # type: ignore
         finally:
             if conn:
-                conn.close()
+                self._release(conn)
         return -1
 
     def set_active_profile(self, profile_id: int):
@@ -410,7 +573,7 @@ class ConfigDB:
         """
         conn = None
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             cursor.execute("SELECT id, fragment, profile_id FROM example WHERE id = ? AND profile_id = ?",
@@ -426,7 +589,7 @@ class ConfigDB:
             return None
         finally:
             if conn:
-                conn.close()
+                self._release(conn)
 
     def create_example(self, fragment: str) -> int:
         """
@@ -440,7 +603,7 @@ class ConfigDB:
         """
         conn = None
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
             cursor.execute("""
                 INSERT INTO example (fragment, profile_id)
@@ -452,7 +615,7 @@ class ConfigDB:
             return new_id # type: ignore
         finally:
             if conn:
-                conn.close()
+                self._release(conn)
 
     def update_example(self, example_id: int, fragment: str) -> int:
         """
@@ -467,7 +630,7 @@ class ConfigDB:
         """
         conn = None
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
             cursor.execute("""
                 UPDATE example
@@ -480,7 +643,7 @@ class ConfigDB:
             return affected_rows
         finally:
             if conn:
-                conn.close()
+                self._release(conn)
 
     def delete_example(self, example_id: int) -> int:
         """
@@ -494,7 +657,7 @@ class ConfigDB:
         """
         conn = None
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
             # Delete associated attributes first
             cursor.execute("DELETE FROM ext_attribute WHERE exists (SELECT 1 FROM extraction WHERE example_id = ?) AND profile_id = ?",
@@ -511,7 +674,7 @@ class ConfigDB:
             return affected_rows
         finally:
             if conn:
-                conn.close()
+                self._release(conn)
 
     def get_extraction_records_by_example_id(self, example_id: int) -> List[ExtractionRecord]:
         """
@@ -525,7 +688,7 @@ class ConfigDB:
         """
         conn = None
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             cursor.execute("""
@@ -558,7 +721,7 @@ class ConfigDB:
             return data
         finally:
             if conn:
-                conn.close()
+                self._release(conn)
 
     def get_extraction_record_by_id(self, extraction_id: int) -> Optional[ExtractionRecord]:
         """
@@ -572,7 +735,7 @@ class ConfigDB:
         """
         conn = None
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             cursor.execute("""
@@ -602,7 +765,7 @@ class ConfigDB:
             return None
         finally:
             if conn:
-                conn.close()
+                self._release(conn)
 
     def create_extraction_record(self, example_id: int, extraction_info_item_id: int, extraction_text: str) -> int:
         """
@@ -618,7 +781,7 @@ class ConfigDB:
         """
         conn = None
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
             cursor.execute("""
                 INSERT INTO extraction (example_id, extraction_info_item_id, extraction_text, profile_id)
@@ -630,7 +793,7 @@ class ConfigDB:
             return new_id # type: ignore
         finally:
             if conn:
-                conn.close()
+                self._release(conn)
 
     def update_extraction_record(self, extraction_id: int, extraction_text: str) -> int:
         """
@@ -645,7 +808,7 @@ class ConfigDB:
         """
         conn = None
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
             cursor.execute("""
                 UPDATE extraction
@@ -658,7 +821,7 @@ class ConfigDB:
             return affected_rows
         finally:
             if conn:
-                conn.close()
+                self._release(conn)
 
     def delete_extraction_record(self, extraction_id: int) -> int:
         """
@@ -672,7 +835,7 @@ class ConfigDB:
         """
         conn = None
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
             # Delete associated attributes first
             cursor.execute("DELETE FROM ext_attribute WHERE extraction_id = ? AND profile_id = ?",
@@ -686,7 +849,7 @@ class ConfigDB:
             return affected_rows
         finally:
             if conn:
-                conn.close()
+                self._release(conn)
 
     def get_extraction_attributes_by_extraction_id(self, extraction_id: int) -> List[ExtractionAttribute]:
         """
@@ -700,7 +863,7 @@ class ConfigDB:
         """
         conn = None
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             cursor.execute("""
@@ -724,7 +887,7 @@ class ConfigDB:
             return data
         finally:
             if conn:
-                conn.close()
+                self._release(conn)
 
     def get_extraction_attribute_by_id(self, attribute_id: int) -> Optional[ExtractionAttribute]:
         """
@@ -738,7 +901,7 @@ class ConfigDB:
         """
         conn = None
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             cursor.execute("""
@@ -759,7 +922,7 @@ class ConfigDB:
             return None
         finally:
             if conn:
-                conn.close()
+                self._release(conn)
 
     def create_extraction_attribute(self, extraction_id: int, key: str, value: str) -> int:
         """
@@ -775,7 +938,7 @@ class ConfigDB:
         """
         conn = None
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
             cursor.execute("""
                 INSERT INTO ext_attribute (extraction_id, "key", value, profile_id)
@@ -787,7 +950,7 @@ class ConfigDB:
             return new_id # type: ignore
         finally:
             if conn:
-                conn.close()
+                self._release(conn)
 
     def update_extraction_attribute(self, attribute_id: int, key: str, value: str) -> int:
         """
@@ -803,7 +966,7 @@ class ConfigDB:
         """
         conn = None
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
             cursor.execute("""
                 UPDATE ext_attribute
@@ -816,7 +979,7 @@ class ConfigDB:
             return affected_rows
         finally:
             if conn:
-                conn.close()
+                self._release(conn)
 
     def delete_extraction_attribute(self, attribute_id: int) -> int:
         """
@@ -830,7 +993,7 @@ class ConfigDB:
         """
         conn = None
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
             cursor.execute("DELETE FROM ext_attribute WHERE id = ? AND profile_id = ?",
                           (attribute_id, self.active_profile_id))
@@ -840,4 +1003,4 @@ class ConfigDB:
             return affected_rows
         finally:
             if conn:
-                conn.close()
\ No newline at end of file
+                self._release(conn)
\ No newline at end of file
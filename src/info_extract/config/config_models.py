@@ -5,7 +5,7 @@ from dataclasses import dataclass
 from typing import Optional
 
 
-@dataclass
+@dataclass(slots=True)
 class InfoItem:
     """Represents an information item in the configuration."""
     id: int
@@ -17,7 +17,7 @@ class InfoItem:
     profile_id: int
 
 
-@dataclass
+@dataclass(slots=True)
 class Example:
     """Represents an example for extraction in the configuration."""
     id: int
@@ -25,7 +25,7 @@ class Example:
     profile_id: int
 
 
-@dataclass
+@dataclass(slots=True)
 class ExtractionRecord:
     """Represents an extraction record for a marked text."""
     id: int
@@ -36,7 +36,7 @@ class ExtractionRecord:
     info_item_label: str
 
 
-@dataclass
+@dataclass(slots=True)
 class ExtractionAttribute:
     """Represents an attribute for an extraction record."""
     id: int
@@ -2,6 +2,7 @@
 Profile manager for the info_extract project.
 Provides centralized management of configuration profiles.
 """
+import copy
 import textwrap
 from typing import List, TypedDict, Optional
 
@@ -39,6 +40,32 @@ class ProfileManager:
         self.config_db = ConfigDB(db_path, default_profile_id)
         self.default_profile_id = default_profile_id
         self._current_profile_id = default_profile_id
+        # Prompt material derived from the database, keyed by _cache_key()
+        self._cache: dict[str, tuple[tuple[int, int], object]] = {}
+
+    def _cache_key(self) -> tuple[int, int]:
+        """Cached values stay valid until the profile switches or the database is written."""
+        return (self.config_db.active_profile_id, self.config_db.version)
+
+    def _cached(self, name: str, build):
+        """Return a copy of the cached value, so callers cannot change what the next caller gets."""
+        key = self._cache_key()
+        entry = self._cache.get(name)
+        if entry is None or entry[0] != key:
+            entry = (key, build())
+            self._cache[name] = entry
+        return copy.deepcopy(entry[1])
+
+    def reset_state(self) -> None:
+        """
+        Drop cached prompt material and return to the default profile.
+
+        The database connections are kept open, so this is much cheaper than
+        building a new ProfileManager.
+        """
+        self._cache.clear()
+        self.config_db.set_active_profile(self.default_profile_id)
+        self._current_profile_id = self.default_profile_id
 
     def get_available_profiles(self) -> List[ProfileInfo]:
         """
@@ -144,6 +171,9 @@ class ProfileManager:
         """
         提供取数映射提示词
         """    
+        return self._cached("info_item_define_prompt", self._build_info_item_define_prompt)
+
+    def _build_info_item_define_prompt(self) -> str:
         config_db = self.get_config_db()
         info_items = config_db.get_info_items()
         prompt = ["# 以下是需要抽取的 ** 信息项 ** ："]
@@ -178,7 +208,11 @@ class ProfileManager:
     def get_examples(self) -> list[ExampleData]:
         """
         从standard.db读取数据并生成一组 langextract.data.ExampleData
+        结果按配置版本缓存，配置修改或切换profile后重新读取
         """    
+        return self._cached("examples", self._build_examples)
+
+    def _build_examples(self) -> list[ExampleData]:
         config_db = self.get_config_db()
 
         # Get all examples
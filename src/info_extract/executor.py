@@ -1,5 +1,7 @@
+import asyncio
 import logging
 import os
+import shutil
 import threading
 from typing import AsyncGenerator, List, Optional
 
@@ -11,6 +13,25 @@ from .destination import ExcelExporter
 
 logger = logging.getLogger(__name__)
 
+# 同步调用方传入 threading.Event 时，后台线程检查该事件的间隔(秒)
+CANCEL_WATCH_INTERVAL = 0.1
+
+
+def _cancel_unless_finished(finished: threading.Event, task: asyncio.Task):
+    """在事件循环中执行：run() 尚未结束时取消迭代它的任务"""
+    if not finished.is_set():
+        task.cancel()
+
+
+def _watch_cancellation(cancellation_event: threading.Event, finished: threading.Event,
+                        loop: asyncio.AbstractEventLoop, task: asyncio.Task):
+    """threading.Event 适配：事件从其他线程被设置后，把 task.cancel() 交给事件循环执行"""
+    while not finished.is_set():
+        if cancellation_event.wait(CANCEL_WATCH_INTERVAL):
+            loop.call_soon_threadsafe(_cancel_unless_finished, finished, task)
+            return
+
+
 class Executor:
     def __init__(self, work_dir:str, specific_files:Optional[List[str]]=None) -> None:
         self.source_dir = os.path.join(work_dir, 'source')
@@ -37,82 +58,75 @@ class Executor:
         
     def clean_processing_dir(self):
         """清理处理目录下的所有文件"""
-        # 清理 processing_dir 下的所有 文件
-        for root, dirs, files in os.walk(self.processing_dir, topdown=False):
-            for file in files:
-                file_path = os.path.join(root, file)
-                try:
-                    os.remove(file_path)
-                except Exception as e:
-                    logger.error(f"删除文件失败: {file_path}, 错误: {e}")
-            for d in dirs:
-                dir_path = os.path.join(root, d)
-                try:
-                    os.rmdir(dir_path)
-                except Exception as e:
-                    logger.error(f"删除目录失败: {dir_path}, 错误: {e}")
+        # 整棵目录交给 rmtree 删除后重建，逐项的失败只记录日志
+        def _log_error(func, path, exc):
+            # 目录不存在或文件已被删除，无需记录
+            if isinstance(exc, FileNotFoundError):
+                return
+            logger.error(f"删除失败: {path}, 错误: {exc}")
+
+        shutil.rmtree(self.processing_dir, onexc=_log_error)
+        os.makedirs(self.processing_dir, exist_ok=True)
     
     @property
     def pipeline(self) -> Pipeline:
         return self._pipeline
     
-    async def run(self, profile_manager : ProfileManager, cancellation_event: Optional[threading.Event] = None) -> AsyncGenerator[str, None]:
+    async def run(self, profile_manager : ProfileManager, cancellation_event: Optional[threading.Event | asyncio.Event] = None) -> AsyncGenerator[str, None]:
         """
         运行所有步骤
-        
+
+        中断方式：取消迭代本生成器的 asyncio 任务，CancelledError 会在当前 await 处
+        直接抛出并关闭正在运行的步骤，无需在循环中轮询。
+
         Args:
-            cancellation_event: 用于中断任务的事件对象
+            cancellation_event: 每个步骤开始前检查，已设置则停止。
+                asyncio.Event 由调用方自行取消任务；threading.Event 供同步调用方使用，
+                在其他线程中被设置时由后台线程取消迭代本生成器的任务，不必等当前步骤结束
         """
-        source_results = []
-        # 运行source步骤
-        for name, step in self.pipeline.source:
-            logger.info(f"Running step {name}")
-            # 检查中断事件
-            if cancellation_event and cancellation_event.is_set():
-                yield f"任务已取消: {name}"
-                return
-            async for result in step.set_specific_files(self.specific_files).run(profile_manager):
-                # 检查中断事件
+        finished = threading.Event()
+        if isinstance(cancellation_event, threading.Event) and not cancellation_event.is_set():
+            threading.Thread(target=_watch_cancellation, name="executor-cancel-watch", daemon=True,
+                             args=(cancellation_event, finished,
+                                   asyncio.get_running_loop(), asyncio.current_task())).start()
+        try:
+            source_results = []
+            # 运行source步骤
+            for name, step in self.pipeline.source:
+                logger.info(f"Running step {name}")
                 if cancellation_event and cancellation_event.is_set():
                     yield f"任务已取消: {name}"
                     return
-                source_results.append(result)
-                yield f"读取{result[0]}"
+                async for result in step.set_specific_files(self.specific_files).run(profile_manager):
+                    source_results.append(result)
+                    yield f"读取{result[0]}"
 
-        extract_results = []
-        # 运行extractors步骤
-        for name, step in self.pipeline.extractors:
-            logger.info(f"Running step {name}")
-            # 检查中断事件
-            if cancellation_event and cancellation_event.is_set():
-                yield f"任务已取消: {name}"
-                return
-            pre_enabled_result = [result for result in source_results if step.verify(result)]
-            step.pre_results = pre_enabled_result
-            async for result in step.run(profile_manager):
-                # 检查中断事件
-                if cancellation_event and cancellation_event.is_set():
-                    yield f"任务已取消: {name}"
-                    return
-                extract_results.append(result)
-                yield f"提取{result[0]}"
-        
-        # 运行destination步骤
-        if self.pipeline.destination:
-            for name, step in self.pipeline.destination:
+            extract_results = []
+            # 运行extractors步骤
+            for name, step in self.pipeline.extractors:
                 logger.info(f"Running step {name}")
-                # 检查中断事件
                 if cancellation_event and cancellation_event.is_set():
                     yield f"任务已取消: {name}"
                     return
-                step.pre_results = extract_results
+                pre_enabled_result = [result for result in source_results if step.verify(result)]
+                step.pre_results = pre_enabled_result
                 async for result in step.run(profile_manager):
-                    # 检查中断事件
+                    extract_results.append(result)
+                    yield f"提取{result[0]}"
+
+            # 运行destination步骤
+            if self.pipeline.destination:
+                for name, step in self.pipeline.destination:
+                    logger.info(f"Running step {name}")
                     if cancellation_event and cancellation_event.is_set():
                         yield f"任务已取消: {name}"
                         return
-                    logger.info(f"Step {name} result: {result}")
-                    yield f"{result[0]}处理完成"
-
-
-
+                    step.pre_results = extract_results
+                    async for result in step.run(profile_manager):
+                        logger.info(f"Step {name} result: {result}")
+                        yield f"{result[0]}处理完成"
+        except asyncio.CancelledError:
+            logger.info("任务已取消")
+            raise
+        finally:
+            finished.set()
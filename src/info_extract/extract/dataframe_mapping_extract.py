@@ -27,15 +27,20 @@ class NormalizeOutput(TypedDict):
     normalized: list[Normalized]
     unmatched: list
     
+_WHITESPACE_RE = re.compile(r'\s+')  # 换行符、制表符和多个空格
+_CHINESE_RE = re.compile(r'[\u4e00-\u9fff]+')
+
 class ColumnUtil:
     clean_patterns = [
-        (r'[\n\r\t]', ' '),  # 换行符和制表符
-        (r'\s+', ' '),       # 多个空格
-        # (r'[\(（].*?[\)）]', ''),  # 括号内容
-        (r'[\(\)（）]', ''),  # 括号
-        (r'[①②③④⑤⑥⑦⑧⑨⑩]', ''), # 序号
-        (r'[#@$%^&*]', ''),  # 特殊符号
+        (_WHITESPACE_RE, ' '),
+        # (re.compile(r'[\(（].*?[\)）]'), ''),  # 括号内容
     ]
+    # 逐字符删除的规则直接用 str.translate，不经过正则引擎
+    delete_table = str.maketrans('', '',
+        '()（）'        # 括号
+        '①②③④⑤⑥⑦⑧⑨⑩'  # 序号
+        '#@$%^&*'       # 特殊符号
+    )
     
     @classmethod
     def advanced_clean_text(cls, text: str) -> str:
@@ -46,12 +51,13 @@ class ColumnUtil:
         # 应用清洗规则
         cleaned = text
         for pattern, replacement in cls.clean_patterns:
-            cleaned = re.sub(pattern, replacement, cleaned)
+            cleaned = pattern.sub(replacement, cleaned)
+        cleaned = cleaned.translate(cls.delete_table)
 
         # 如果过滤后为空，返回原始文本的主要部分
         if not cleaned:
             # 提取最长连续中文字符串
-            chinese_parts = re.findall(r'[\u4e00-\u9fff]+', text)
+            chinese_parts = _CHINESE_RE.findall(text)
             if chinese_parts:
                 cleaned = max(chinese_parts, key=len)
             else:
@@ -213,6 +219,8 @@ class SemanticHeaderNormalizer:
                 self.standard_header_index[synonym] = i
         
         self.standard_representations = self._get_representations(list(self.standard_header_index.keys()))
+        # 每个同义词（表示矩阵的行）对应的标准字段下标
+        self.synonym_positions = np.fromiter(self.standard_header_index.values(), dtype=np.intp)
 
     def _get_synonyms(self, describe: str):
         """
@@ -267,20 +275,16 @@ class SemanticHeaderNormalizer:
         num_input = len(input_headers)
         std_to_input_sim = np.full((num_std, num_input), -1.0)  # 初始化为 -1
 
-        for syn_idx, (_, std_pos) in enumerate(self.standard_header_index.items()):
-            # 对每个输入，取该标准字段下所有同义词的最大相似度
-            std_to_input_sim[std_pos] = np.maximum(std_to_input_sim[std_pos], sim_matrix[syn_idx])
+        # 对每个输入，取该标准字段下所有同义词的最大相似度（按行分组求最大值）
+        np.maximum.at(std_to_input_sim, self.synonym_positions, sim_matrix)
 
         # Step 3: 构建候选匹配列表 (score, std_idx, input_idx)
-        candidates = []
-        for std_idx in range(num_std):
-            for inp_idx in range(num_input):
-                score = std_to_input_sim[std_idx, inp_idx]
-                if score >= min_confidence:
-                    candidates.append((score, std_idx, inp_idx))
+        std_indices, inp_indices = np.nonzero(std_to_input_sim >= min_confidence)
+        scores = std_to_input_sim[std_indices, inp_indices]
 
-        # 按置信度降序排序（高分优先分配）
-        candidates.sort(key=lambda x: x[0], reverse=True)
+        # 按置信度降序排序（高分优先分配），同分保持行优先顺序
+        order = np.argsort(-scores, kind="stable")
+        candidates = zip(scores[order].tolist(), std_indices[order].tolist(), inp_indices[order].tolist())
 
         # Step 4: 贪心分配，避免冲突
         assigned_std = set()
@@ -1,3 +1,4 @@
+import asyncio
 import json
 import logging
 import os
@@ -23,7 +24,7 @@ lx.core.tokenizer.tokenize = tokenize
 logger = logging.getLogger(__name__)
 
 class PlainExtractor(Step):
-    def __init__(self, processing_dir: str = "processing") -> None:
+    def __init__(self, processing_dir: str = "processing", max_workers: int = 4) -> None:
         load_dotenv()
         self._model_id = os.environ.get("EXTRACT_MODEL_ID")
         self._api_key = os.environ.get("EXTRACT_API_KEY")
@@ -40,6 +41,8 @@ class PlainExtractor(Step):
         self.model = lx.factory.create_model(config)
         
         self.processing_dir = Path(processing_dir)
+        # 并发请求 LLM 的上限（由 langextract 内部线程池控制）
+        self.max_workers = max_workers
 
         # 确保目录存在
         self.processing_dir.mkdir(exist_ok=True)
@@ -111,7 +114,7 @@ class PlainExtractor(Step):
                 prompt_description=lx_prompt,
                 examples=examples,
                 model = self.model,
-                max_workers=1,            # Parallel processing for speed
+                max_workers=self.max_workers,  # Parallel processing for speed
                 max_char_buffer=512,      # Smaller contexts for better accuracy
                 debug=debug,
                 prompt_validation_level=\
@@ -121,8 +124,9 @@ class PlainExtractor(Step):
         if isinstance(result, AnnotatedDocument):
             yield self._push_rows(result)
         else:
-            # _start_time = time.time()
-            for r in tqdm(result, desc="信息提取", total=len(docs)):
-                # tqdm.write(f"已处理文档ID: {r.document_id}, 耗时: {time.time() - _start_time:.2f}秒")
-                yield self._push_rows(r)
-                # _start_time = time.time()
+            # 结果为惰性生成器，每取一条都会阻塞等待 LLM，放到线程中迭代以免卡住事件循环
+            it = iter(result)
+            with tqdm(desc="信息提取", total=len(docs)) as pbar:
+                while (r := await asyncio.to_thread(next, it, None)) is not None:
+                    pbar.update()
+                    yield self._push_rows(r)
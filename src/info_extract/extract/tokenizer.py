@@ -1,4 +1,5 @@
 import enum
+import functools
 from langextract.core import debug_utils
 from langextract.core.tokenizer import CharInterval, Token, TokenType, TokenizedText
 import regex
@@ -27,13 +28,19 @@ _WORD_PATTERN = regex.compile(rf"(?:{_LETTERS_PATTERN}|{_DIGITS_PATTERN})\Z")
 _KNOWN_ABBREVIATIONS = frozenset({"Mr.", "Mrs.", "Ms.", "Dr.", "Prof.", "St."})
 
 
+@functools.cache
+def _segmenter():
+    """pkuseg loads its model on construction, so build it once and reuse it for every CJK token."""
+    import pkuseg
+    return pkuseg.pkuseg()
+
+
 def _cjk_tokenize(text: str, start_pos: int = 0, token: Token | None = None) -> list[Token]:
     tokens = []
     previous_end = 0
     if not _CJK_PATTERN.match(text) and token is not None:
         return [token]
-    import pkuseg
-    seg = pkuseg.pkuseg() 
+    seg = _segmenter()
     for token_index, word in enumerate(seg.cut(text)):
         _sub_start_pos, _sub_end_pos = previous_end, previous_end + len(word)
         # Create a new token.
@@ -98,4 +105,13 @@ def tokenize(text: str) -> TokenizedText:
     else:
       tokenized.tokens.append(token)
     previous_end = end_pos
-  return tokenized
\ No newline at end of file
+  return tokenized
+
+
+def tokens_to_strings(tokenized: TokenizedText) -> list[str]:
+    """Return the text of every token in `tokenized`, in order."""
+    text = tokenized.text
+    return [
+        text[token.char_interval.start_pos:token.char_interval.end_pos]
+        for token in tokenized.tokens
+    ]
@@ -1,5 +1,7 @@
 import abc
+import fnmatch
 import logging
+import os
 import threading
 from pathlib import Path
 from typing import Any, AsyncGenerator, Generator, Iterator, List, Optional, Self, Tuple, TypeAlias, overload
@@ -30,7 +32,10 @@ class Step(abc.ABC):
         if self.specific_files:
             return [ Path(f) for f in self.specific_files if Path(f).match(pattern) ]
         else:
-            return [ f for f in source_dir.glob(pattern) ]
+            # scandir 的 DirEntry 自带文件类型，无需像 glob 那样逐个 stat
+            with os.scandir(source_dir) as it:
+                return [ Path(entry.path) for entry in it
+                         if fnmatch.fnmatch(entry.name, pattern) and entry.is_file() ]
 
 
 StepGroup: TypeAlias = List[Tuple[str, Step]]
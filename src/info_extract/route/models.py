@@ -0,0 +1,30 @@
+"""Request body models for the UI API routes."""
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class InfoItemIn(BaseModel):
+    label: str = Field(min_length=1)
+    describe: Optional[str] = None
+    data_type: str = Field(min_length=1)
+    sort_no: Optional[int] = None
+    sample_col_name: Optional[str] = ''
+
+
+class SortEntry(BaseModel):
+    id: int
+    sort_no: int
+
+
+class SortIn(BaseModel):
+    items: List[SortEntry] = Field(min_length=1)
+
+
+class ProfileSwitchIn(BaseModel):
+    profile_id: int
+
+
+class ProfileIn(BaseModel):
+    name: str = Field(min_length=1)
+    description: str = ''
@@ -2,25 +2,118 @@
 
 import asyncio
 from datetime import datetime
-import json
+import functools
 import os
 from pathlib import Path
-import threading
+import stat
 from typing import Dict, List, Tuple
 import uuid
+
+import orjson
 from fastapi import APIRouter, Depends, Request
-from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from fastapi.responses import FileResponse, ORJSONResponse, StreamingResponse
 
 from ..executor import Executor
 
 from ..config.profile_manager import ProfileManager
 
+from .models import ProfileIn, ProfileSwitchIn
 from .tools import get_history_tasks, get_profile_manager, get_work_dir
 
 
 task_router = APIRouter()
 
-running_executors: Dict[str, Tuple[Executor, threading.Event]] = {}
+# Task id -> executor and its cancellation event; set by cancel_task on the event loop
+running_executors: Dict[str, Tuple[Executor, asyncio.Event]] = {}
+# Task id -> asyncio task driving Executor.run, cancelled directly by cancel_task
+pipeline_tasks: Dict[str, asyncio.Task] = {}
+
+# Task history is capped, the oldest finished tasks are dropped first
+MAX_TASK_HISTORY = 500
+_FINISHED_STATUSES = frozenset({'completed', 'failed', 'cancelled'})
+
+
+def _remember_task(tasks: Dict[str, dict], task_id: str, task: dict):
+    """Add a task to the history, evicting the oldest finished tasks past the cap.
+
+    All task handlers run on the event loop, so the history is never mutated concurrently.
+    """
+    tasks[task_id] = task
+    overflow = len(tasks) - MAX_TASK_HISTORY
+    if overflow <= 0:
+        return
+
+    # dict keeps insertion order, so the first finished entries are the oldest
+    evicted = [tid for tid, t in tasks.items() if t['status'] in _FINISHED_STATUSES][:overflow]
+    for tid in evicted:
+        del tasks[tid]
+
+
+class ResultFileResponse(FileResponse):
+    """FileResponse with larger reads for the result workbooks.
+
+    Starlette hands the file to the server with sendfile only when the server
+    supports the pathsend extension (uvicorn does not); otherwise it copies it
+    in chunk_size reads, so bigger chunks mean far fewer loop iterations.
+    Content-Length is always set from the stat result.
+    """
+    chunk_size = 1024 * 1024
+
+
+# Pacing of the progress stream, so the page can render each step
+STATUS_FRAME_DELAY = 0.1
+PROGRESS_FRAME_DELAY = 1.0
+
+SSE_PREFIX = b"data: "
+SSE_SUFFIX = b"\n\n"
+
+
+def _sse_frame(payload: dict) -> bytes:
+    """Encode a payload as a server-sent event frame."""
+    return SSE_PREFIX + orjson.dumps(payload) + SSE_SUFFIX
+
+
+# File extensions shown in the file browser
+_ALLOWED_EXTENSIONS = frozenset({'.eml', '.msg', '.xlsx'})
+
+
+def _list_directory(path: str) -> List[dict]:
+    """List sub-directories and supported files, using the stat info cached by scandir."""
+    contents = []
+    with os.scandir(path) as it:
+        for entry in it:
+            is_dir = entry.is_dir()
+
+            # Only include files with allowed extensions or directories
+            if is_dir or os.path.splitext(entry.name)[1].lower() in _ALLOWED_EXTENSIONS:
+                st = entry.stat()
+                contents.append({
+                    'name': entry.name,
+                    'path': entry.path,
+                    'is_directory': is_dir,
+                    'size': st.st_size if not is_dir else 0,
+                    'modified': st.st_mtime
+                })
+    return contents
+
+
+def _list_result_files(destination_dir: str) -> List[str]:
+    """Names of the files produced in the destination directory."""
+    with os.scandir(destination_dir) as it:
+        return [entry.name for entry in it if entry.is_file()]
+
+
+@functools.lru_cache(maxsize=32)
+def _resolve_absolute(work_dir: str) -> Path:
+    """Resolve an absolute working directory once, resolving walks symlinks on disk."""
+    return Path(os.path.realpath(work_dir))
+
+
+def _resolved_base(work_dir: str) -> Path:
+    """Resolve a working directory; a relative one depends on the process cwd, so it is never cached."""
+    if os.path.isabs(work_dir):
+        return _resolve_absolute(work_dir)
+    return Path(os.path.realpath(work_dir))
 
 
 # File browsing API
@@ -38,52 +131,39 @@ async def set_working_directory(request: Request, work_dir:str = Depends(get_wor
 
         # Validate the path to prevent directory traversal
         if not os.path.exists(new_path) or not os.path.isdir(new_path):
-            return JSONResponse(content={'error': 'Invalid directory path'}, status_code=400)
+            return ORJSONResponse(content={'error': 'Invalid directory path'}, status_code=400)
 
         # Security check: ensure the path is within allowed boundaries
-        if not Path(new_path).resolve().is_relative_to(Path(work_dir).resolve()):
+        if not Path(os.path.realpath(new_path)).is_relative_to(_resolved_base(work_dir)):
             # If the new directory is not within the current working directory, update it
             request.state.work_dir = new_path
 
         return {'working_directory': new_path}
     except Exception as e:
-        return JSONResponse(content={'error': str(e)}, status_code=500)
+        return ORJSONResponse(content={'error': str(e)}, status_code=500)
 
 @task_router.get('/files')
 async def get_directory_contents(path: str|None = None, work_dir:str = Depends(get_work_dir)):
     """Get contents of a directory."""
     try:
-        # Use the path from query parameter or default to the working directory
-        path = path or work_dir
-
-        # Security: validate path is within allowed boundaries
-        requested_path = Path(path).resolve()
-        base_path = Path(work_dir).resolve()
-
-        if not requested_path.is_relative_to(base_path):
-            return JSONResponse(content={'error': 'Access denied'}, status_code=403)
-
-        if not os.path.exists(path) or not os.path.isdir(path):
-            return JSONResponse(content={'error': 'Directory does not exist'}, status_code=400)
-
-        contents = []
-        for item in os.listdir(path):
-            item_path = os.path.join(path, item)
-            is_dir = os.path.isdir(item_path)
-
-            # Only include files with allowed extensions or directories
-            if is_dir or item.lower().endswith(('.eml', '.msg', '.xlsx')):
-                contents.append({
-                    'name': item,
-                    'path': item_path,
-                    'is_directory': is_dir,
-                    'size': os.path.getsize(item_path) if not is_dir else 0,
-                    'modified': os.path.getmtime(item_path)
-                })
-
-        return contents
+        # Security: validate path is within allowed boundaries.
+        # The working directory itself (the default) needs no resolving; any other
+        # path is resolved fully, since a symlink in any component could lead out.
+        if path and path != work_dir:
+            requested_path = Path(os.path.realpath(path))
+            if not requested_path.is_relative_to(_resolved_base(work_dir)):
+                return ORJSONResponse(content={'error': 'Access denied'}, status_code=403)
+        else:
+            path = work_dir
+
+        # isdir is False for missing paths too, one stat covers both checks
+        if not os.path.isdir(path):
+            return ORJSONResponse(content={'error': 'Directory does not exist'}, status_code=400)
+
+        # Scanning can be slow on network drives, keep it off the event loop
+        return await asyncio.to_thread(_list_directory, path)
     except Exception as e:
-        return JSONResponse(content={'error': str(e)}, status_code=500)
+        return ORJSONResponse(content={'error': str(e)}, status_code=500)
 
 # Task management API
 @task_router.get('/tasks')
@@ -103,7 +183,7 @@ async def create_task_stream(request: Request,
     files: List[str] = data.get('files', [])
 
     # Generate a unique task ID
-    task_id = str(uuid.uuid4())
+    task_id = uuid.uuid4().hex
 
     # Create task object
     task = {
@@ -118,45 +198,76 @@ async def create_task_stream(request: Request,
         'files': files
     }
 
-    tasks[task_id] = task
+    _remember_task(tasks, task_id, task)
 
     async def generate_progress_stream():
         """Generate a stream of progress updates."""
         # Yield initial task info
-        yield f"data: {json.dumps({'type': 'task_info', 'data': task})}\n\n"
-        await asyncio.sleep(0.1)
+        yield _sse_frame({'type': 'task_info', 'data': task})
+        await asyncio.sleep(STATUS_FRAME_DELAY)
         # Update task status to started
         task['status'] = 'processing'
         task['started_at'] = datetime.now().isoformat()
 
         # Yield status update
-        yield f"data: {json.dumps({'type': 'status_update', 'data': {'task_id': task_id, 'status': 'processing', 'progress': 0}})}\n\n"
-        await asyncio.sleep(0.1)
+        yield _sse_frame({'type': 'status_update', 'data': {'task_id': task_id, 'status': 'processing', 'progress': 0}})
+        await asyncio.sleep(STATUS_FRAME_DELAY)
         try:
-            # Import source modules dynamically to process different file types
-            from ..executor import Executor
-            import threading
-
             executor = Executor(work_dir, specific_files=files)
-            executor.clean_processing_dir()
+            # Filesystem cleanup is blocking, keep it off the event loop
+            await asyncio.to_thread(executor.clean_processing_dir)
             
-            # Create cancellation event
-            cancellation_event = threading.Event()
+            # Create cancellation event; the handlers share the event loop, no thread-safe event needed
+            cancellation_event = asyncio.Event()
             # Store executor and cancellation event
             running_executors[task_id] = (executor, cancellation_event)
 
             p = 0
-
-            # Process all files at once using the executor with cancellation support
-            async for txt in executor.run(profile_manager, cancellation_event=cancellation_event):
-                # Check if task was cancelled
-                if cancellation_event.is_set():
-                    break
-                    
-                p += int((100 - p) / 10)
-                task['progress'] = p
-                yield f"data: {json.dumps({'type': 'progress_update', 'data': {'task_id': task_id, 'progress': p, 'log': txt}})}\n\n"
-                await asyncio.sleep(1)
+            # Reused for every progress frame, only progress/log change
+            progress_data = {'task_id': task_id, 'progress': 0, 'log': ''}
+            progress_event = {'type': 'progress_update', 'data': progress_data}
+
+            # Run the pipeline in its own task so a slow client does not hold up processing;
+            # the queue carries log lines, then None when done or the exception that stopped it
+            queue: asyncio.Queue = asyncio.Queue(maxsize=64)
+
+            async def produce():
+                try:
+                    # Process all files at once; cancel_task cancels this task directly
+                    async for txt in executor.run(profile_manager):
+                        await queue.put(txt)
+                except asyncio.CancelledError:
+                    # Wake the consumer even if the queue is full
+                    queue.shutdown()
+                    raise
+                except Exception as e:
+                    await queue.put(e)
+                else:
+                    await queue.put(None)
+
+            producer = asyncio.create_task(produce())
+            pipeline_tasks[task_id] = producer
+            try:
+                while (txt := await queue.get()) is not None:
+                    if isinstance(txt, Exception):
+                        raise txt
+
+                    # Check if task was cancelled
+                    if cancellation_event.is_set():
+                        break
+
+                    p += int((100 - p) / 10)
+                    task['progress'] = p
+                    progress_data['progress'] = p
+                    progress_data['log'] = txt
+                    yield _sse_frame(progress_event)
+                    await asyncio.sleep(PROGRESS_FRAME_DELAY)
+            except asyncio.QueueShutDown:
+                # The pipeline task was cancelled
+                pass
+            finally:
+                # Stop the pipeline if the client went away or the task was cancelled
+                producer.cancel()
 
             # Check if task was cancelled
             if cancellation_event.is_set():
@@ -164,23 +275,25 @@ async def create_task_stream(request: Request,
                 task['status'] = 'cancelled'
                 task['completed_at'] = datetime.now().isoformat()
                 # Yield cancellation update
-                yield f"data: {json.dumps({'type': 'cancellation', 'data': {'task_id': task_id, 'status': 'cancelled'}})}\n\n"
+                yield _sse_frame({'type': 'cancellation', 'data': {'task_id': task_id, 'status': 'cancelled'}})
             else:
                 # Update progress to 100% after processing
                 task['progress'] = 100
 
                 # Yield progress update
-                yield f"data: {json.dumps({'type': 'progress_update', 'data': {'task_id': task_id, 'progress': 100}})}\n\n"
+                yield _sse_frame({'type': 'progress_update', 'data': {'task_id': task_id, 'progress': 100}})
 
                 # Update task status to completed
                 task['status'] = 'completed'
                 task['completed_at'] = datetime.now().isoformat()
                 task['progress'] = 100
                 # Add the result files to the task
-                task['result_files'] = [f for f in os.listdir(executor.destination_dir) if os.path.isfile(os.path.join(executor.destination_dir, f))]
+                task['result_files'] = await asyncio.to_thread(_list_result_files, executor.destination_dir)
+                # Downloads are served from where this task wrote them
+                task['result_dir'] = executor.destination_dir
 
                 # Yield completion update
-                yield f"data: {json.dumps({'type': 'completion', 'data': {'task_id': task_id, 'status': 'completed', 'progress': 100, 'result_files': task['result_files']}})}\n\n"
+                yield _sse_frame({'type': 'completion', 'data': {'task_id': task_id, 'status': 'completed', 'progress': 100, 'result_files': task['result_files']}})
 
         except Exception as e:
             # Update task status to failed
@@ -189,21 +302,22 @@ async def create_task_stream(request: Request,
             task['completed_at'] = datetime.now().isoformat()
 
             # Yield error update
-            yield f"data: {json.dumps({'type': 'error', 'data': {'task_id': task_id, 'status': 'failed', 'error': str(e)}})}\n\n"
+            yield _sse_frame({'type': 'error', 'data': {'task_id': task_id, 'status': 'failed', 'error': str(e)}})
         finally:
-            # Remove from running executors
-            if task_id in running_executors:
-                del running_executors[task_id]
+            # Remove from running executors (cancel_task may already have done so)
+            running_executors.pop(task_id, None)
+            pipeline_tasks.pop(task_id, None)
 
     # Return the streaming response
-    return StreamingResponse(generate_progress_stream(), media_type="text/plain")
+    return StreamingResponse(generate_progress_stream(), media_type="text/event-stream",
+                             headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 @task_router.get('/tasks/{task_id}')
 async def get_task(task_id: str, tasks = Depends(get_history_tasks)):
     """Get a specific task."""
     task = tasks.get(task_id)
     if not task:
-        return JSONResponse(content={'error': 'Task not found'}, status_code=404)
+        return ORJSONResponse(content={'error': 'Task not found'}, status_code=404)
     return task
 
 @task_router.post('/tasks/{task_id}/cancel')
@@ -211,15 +325,20 @@ async def cancel_task(task_id: str, tasks = Depends(get_history_tasks)):
     """Cancel a specific task."""
     task = tasks.get(task_id)
     if not task:
-        return JSONResponse(content={'error': 'Task not found'}, status_code=404)
+        return ORJSONResponse(content={'error': 'Task not found'}, status_code=404)
 
     if task['status'] in ['completed', 'failed']:
-        return JSONResponse(content={'error': 'Cannot cancel completed or failed task'}, status_code=400)
+        return ORJSONResponse(content={'error': 'Cannot cancel completed or failed task'}, status_code=400)
 
-    # Set cancellation event if task is running
-    if task_id in running_executors:
-        _, cancellation_event = running_executors[task_id]
+    # Set cancellation event if task is running; the stream keeps its own reference to the event
+    running = running_executors.pop(task_id, None)
+    if running is not None:
+        _, cancellation_event = running
         cancellation_event.set()
+    # Interrupt the pipeline at its current await instead of after its next item
+    producer = pipeline_tasks.pop(task_id, None)
+    if producer is not None:
+        producer.cancel()
 
     # Update task status to cancelled
     task['status'] = 'cancelled'
@@ -234,72 +353,71 @@ async def get_result_file(filename: str, tasks = Depends(get_history_tasks), wor
     try:
         # Security: ensure the filename doesn't contain path traversal
         if '..' in filename or filename.startswith('/'):
-            return JSONResponse(content={'error': 'Invalid filename'}, status_code=400)
-
-        # Find the file in task results
-        for task in tasks.values():
-            if filename in task.get('result_files', []):
-                filepath = os.path.join(task.get('working_directory', work_dir), filename)
-                if os.path.exists(filepath):
-                    return FileResponse(path=filepath, filename=os.path.basename(filepath))
-
-        return JSONResponse(content={'error': 'File not found'}, status_code=404)
+            return ORJSONResponse(content={'error': 'Invalid filename'}, status_code=400)
+
+        # Find the file in task results, the newest task wins if several produced the same name
+        for task in reversed(tasks.values()):
+            if filename not in task.get('result_files', []):
+                continue
+            filepath = os.path.join(task.get('result_dir', work_dir), filename)
+            try:
+                file_stat = os.stat(filepath)
+            except FileNotFoundError:
+                file_stat = None
+            if file_stat is not None and stat.S_ISREG(file_stat.st_mode):
+                # Hand over the stat result so FileResponse does not stat the file again
+                return ResultFileResponse(path=filepath, filename=os.path.basename(filepath),
+                                          stat_result=file_stat, media_type="application/octet-stream")
+
+        return ORJSONResponse(content={'error': 'File not found'}, status_code=404)
     except Exception as e:
-        return JSONResponse(content={'error': str(e)}, status_code=500)
+        return ORJSONResponse(content={'error': str(e)}, status_code=500)
 
 # Profile management endpoints
 @task_router.get('/config/profiles')
-async def get_profiles(profile_manager: ProfileManager = Depends(get_profile_manager)):
+def get_profiles(profile_manager: ProfileManager = Depends(get_profile_manager)):
     """Get all available profiles."""
     try:
         profiles = profile_manager.get_available_profiles()
         return profiles
     except Exception as e:
-        return JSONResponse(content={'error': str(e)}, status_code=500)
+        return ORJSONResponse(content={'error': str(e)}, status_code=500)
 
 @task_router.post('/config/profiles/switch')
-async def switch_profile(request: Request, profile_manager: ProfileManager = Depends(get_profile_manager)):
+def switch_profile(payload: ProfileSwitchIn, profile_manager: ProfileManager = Depends(get_profile_manager)):
     """Switch to a different profile."""
     try:
-        data = await request.json()
-        profile_id = data.get('profile_id')
-
-        if not profile_id:
-            return JSONResponse(content={'error': 'profile_id is required'}, status_code=400)
+        profile_id = payload.profile_id
 
         success = profile_manager.switch_profile(profile_id)
         if not success:
-            return JSONResponse(content={'error': 'Profile not found'}, status_code=404)
+            return ORJSONResponse(content={'error': 'Profile not found'}, status_code=404)
 
         return {'success': True, 'message': f'Profile switched to ID {profile_id}'}
     except Exception as e:
-        return JSONResponse(content={'error': str(e)}, status_code=500)
+        return ORJSONResponse(content={'error': str(e)}, status_code=500)
 
 @task_router.get('/config/profiles/current')
-async def get_current_profile(profile_manager: ProfileManager = Depends(get_profile_manager)):
+def get_current_profile(profile_manager: ProfileManager = Depends(get_profile_manager)):
     """Get the current active profile."""
     try:
         current_profile = profile_manager.get_current_profile()
         return current_profile
     except Exception as e:
-        return JSONResponse(content={'error': str(e)}, status_code=500)
+        return ORJSONResponse(content={'error': str(e)}, status_code=500)
 
 @task_router.post('/config/profiles')
-async def create_profile(request: Request, profile_manager: ProfileManager = Depends(get_profile_manager)):
+def create_profile(payload: ProfileIn, profile_manager: ProfileManager = Depends(get_profile_manager)):
     """Create a new profile."""
     try:
-        data = await request.json()
-        name = data.get('name')
-        description = data.get('description', '')
-
-        if not name:
-            return JSONResponse(content={'error': 'name is required'}, status_code=400)
+        name = payload.name
+        description = payload.description
 
         # Check if profile with this name already exists
         existing_profiles = profile_manager.get_available_profiles()
         for profile in existing_profiles:
             if profile['name'] == name:
-                return JSONResponse(content={'error': f'Profile with name "{name}" already exists'}, status_code=400)
+                return ORJSONResponse(content={'error': f'Profile with name "{name}" already exists'}, status_code=400)
 
         new_profile_id = profile_manager.create_profile(name, description)
         return {
@@ -310,4 +428,4 @@ async def create_profile(request: Request, profile_manager: ProfileManager = Dep
             'isActive': False
         }
     except Exception as e:
-        return JSONResponse(content={'error': str(e)}, status_code=500)
\ No newline at end of file
+        return ORJSONResponse(content={'error': str(e)}, status_code=500)
\ No newline at end of file
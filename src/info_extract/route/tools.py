@@ -1,5 +1,6 @@
 from typing import List, Dict, Any, TypeAlias
-from fastapi import Request
+from fastapi import Depends, Request
+from ..config.config_db import ConfigDB
 from ..config.profile_manager import ProfileManager
 
 TaskList : TypeAlias = Dict[str, Dict[str, Any]]
@@ -7,6 +8,9 @@ TaskList : TypeAlias = Dict[str, Dict[str, Any]]
 async def get_profile_manager(request: Request) -> ProfileManager:
     return request.state.profile_manager
 
+async def get_config_db(profile_manager: ProfileManager = Depends(get_profile_manager)) -> ConfigDB:
+    return profile_manager.get_config_db()
+
 async def get_work_dir(request: Request) -> str:
     return request.state.work_dir
 
@@ -20,6 +20,8 @@ class EmailReader(Step):
         """
         self.source_dir = Path(source_dir)
         self.processing_dir = Path(processing_dir)
+        # 处理失败的邮件移动到该目录
+        self.error_dir = self.source_dir.parent / "error"
         
         # 确保目录存在
         self.source_dir.mkdir(exist_ok=True)
@@ -1,3 +1,5 @@
+import asyncio
+from itertools import islice
 import re
 import json
 import logging
@@ -10,13 +12,25 @@ import pandas as pd
 
 from ..pipeline import Step, StepResult
 from ..config.profile_manager import ProfileManager
-from ..utils import classify_excel_sheets, excel_to_png_via_com, recognize_image
+from ..utils import ExcelSession, classify_excel_sheets_many, excel_to_png_via_com, recognize_image
 
 logger = logging.getLogger(__name__)
 warnings.simplefilter("ignore", category=UserWarning)
 
 SheetType: TypeAlias = Literal["Data", "Form", "Unknown"]
 
+_CHINESE_CHAR_RE = re.compile("[\u4e00-\u9fff]")
+
+
+def _is_number(val: str) -> bool:
+    """15位以内的整数/小数视为数值（排除身份证等长数字字符串），等价于 ^-?\\d+(\\.\\d+)?$"""
+    if len(val) > 15:
+        return False
+    if val[:1] == "-":
+        val = val[1:]
+    int_part, dot, frac_part = val.partition(".")
+    return int_part.isdecimal() and (not dot or frac_part.isdecimal())
+
 
 class SheetMeta(TypedDict):
     sheet_name: str
@@ -56,12 +70,12 @@ class ExcelReader(Step):
         _files = self.source_files(self.source_dir, "*.xls*")
         logger.info(f"找到 {len(_files)} 个excel文件")
 
-        for excel_file in _files:
-            if excel_file.stem.endswith("~"):
-                continue
+        _files = [f for f in _files if not f.stem.endswith("~")]
 
-            # 分类sheet
-            sheets = classify_excel_sheets(str(excel_file))
+        # 一次性批量分类所有文件的sheet，不阻塞事件循环
+        classified = await asyncio.to_thread(classify_excel_sheets_many, _files)
+
+        for excel_file, sheets in zip(_files, classified):
             if not sheets:
                 logger.warning(f"分类sheet失败 {excel_file}")
                 continue
@@ -78,33 +92,35 @@ class ExcelReader(Step):
                     form_sheets.append(sheet["original"]["sheet_name"])
             
             if len(form_sheets) > 0:
-                for sheet_name in form_sheets:
-                    fname = f"{excel_file.stem}_{sheet_name}"
-                    sheet_png = self.processing_dir / f"{excel_file.stem}_{sheet_name}.png"
-                    try:
-                        excel_to_png_via_com(excel_file, sheet_png, sheet_name)
-                    except Exception as exp:
-                        logger.warning(f"转换sheet {sheet_name} 为png异常 {str(exp)}")
-                        continue
-                    try:
-                        result = await recognize_image(str(sheet_png))
-                    except Exception as exp:
-                        logger.warning(f"识别sheet {sheet_name} 异常 {str(exp)}")
-                        continue
-                    df = result.to_pandas()
-                    if df is None:
-                        continue
-                    n_rows = len(df)
-                    meta = SheetMeta(
-                        sheet_name=fname,
-                        header_row=0,
-                        columns=list(df.columns),
-                        sample_data=[],
-                    )
-                    self.meta_list.append(meta)
-                    parquet_file = self.processing_dir / f"{fname}.parquet"
-                    df.to_parquet(parquet_file, index=False)
-                    yield str(parquet_file), excel_file.stem
+                # 同一文件的多个sheet复用一个Excel进程
+                with ExcelSession() as excel_session:
+                    for sheet_name in form_sheets:
+                        fname = f"{excel_file.stem}_{sheet_name}"
+                        sheet_png = self.processing_dir / f"{excel_file.stem}_{sheet_name}.png"
+                        try:
+                            excel_to_png_via_com(excel_file, sheet_png, sheet_name, session=excel_session)
+                        except Exception as exp:
+                            logger.warning(f"转换sheet {sheet_name} 为png异常 {str(exp)}")
+                            continue
+                        try:
+                            result = await recognize_image(str(sheet_png))
+                        except Exception as exp:
+                            logger.warning(f"识别sheet {sheet_name} 异常 {str(exp)}")
+                            continue
+                        df = result.to_pandas()
+                        if df is None:
+                            continue
+                        n_rows = len(df)
+                        meta = SheetMeta(
+                            sheet_name=fname,
+                            header_row=0,
+                            columns=list(df.columns),
+                            sample_data=[],
+                        )
+                        self.meta_list.append(meta)
+                        parquet_file = self.processing_dir / f"{fname}.parquet"
+                        df.to_parquet(parquet_file, index=False)
+                        yield str(parquet_file), excel_file.stem
 
             try:
                 book = load_workbook(str(excel_file))
@@ -126,9 +142,13 @@ class ExcelReader(Step):
                     continue
 
                 fname = f"{excel_file.stem}_{sheet_name}"
-                # 读取数据
+                # 读取数据（calamine 引擎基于Rust解析，比openpyxl快一个数量级）
                 df = pd.read_excel(
-                    excel_file, sheet_name=sheet_name, header=header_row, dtype=str
+                    excel_file,
+                    sheet_name=sheet_name,
+                    header=header_row,
+                    dtype=str,
+                    engine="calamine",
                 )
                 if (
                     "姓名" in df.columns
@@ -225,12 +245,11 @@ class ExcelReader(Step):
         int
             表头行号（从 0 开始），找不到则返回 -1
         """
-        ncols = max(sheet.max_column, 1)
-        for r_idx, row in enumerate(
-            sheet.iter_rows(min_row=1, max_row=min(max_scan_rows, sheet.max_row)),
-            start=0,
-        ):
-            row_values = [cell.value for cell in row]
+        # 只读取前 max_scan_rows 行；列数取这些行的最大宽度，
+        # 只读模式下 max_row/max_column 需要完整解析才能得到
+        scan_rows = list(islice(sheet.iter_rows(values_only=True), max_scan_rows))
+        ncols = max(max((len(row) for row in scan_rows), default=0), 1)
+        for r_idx, row_values in enumerate(scan_rows):
             # 1. 空值比例策略
             non_blanks = sum(1 for v in row_values if v is not None and str(v).strip())
             if non_blanks / ncols < (1 - blanks_ratio):
@@ -259,27 +278,44 @@ class ExcelReader(Step):
         """
         改进的表头行查找算法
         新增特征：文本属性（中文/名词）、数字占比、与数据行的区分度、唯一值密度
+        给定 header_candidates 时，第一个满足空值比例且命中全部关键字的行直接作为表头返回
         """
+        is_number = _is_number
+        count_chinese = _CHINESE_CHAR_RE.findall
+        min_non_blank_ratio = 1 - blanks_ratio
+
         # 预处理：获取所有扫描行的原始值和处理后的值（去空、去空格）
         scan_rows = []
-        max_row = min(max_scan_rows, sheet.max_row)
-        ncols = max(sheet.max_column, 1) if sheet.max_column else 1  # 处理空表格
         max_row_value_count = 0
-        for r_idx in range(1, max_row + 1):
-            row_cells = sheet[r_idx]  # 按行索引取单元格（从1开始）
-            row_values = [cell.value for cell in row_cells]
-            # 处理后的值：非空、去空格、转字符串
-            processed_vals = [
-                str(v).strip()
-                for v in row_values
-                if v is not None and str(v).strip() != ""
-            ]
+        # values_only 直接返回单元格值，不构造 Cell 对象
+        for r_idx, row_values in enumerate(
+            islice(sheet.iter_rows(values_only=True), max_scan_rows), start=1
+        ):
+            # 单次遍历同时得到处理后的值（非空、去空格、转字符串）、
+            # 数字单元格数（规则3和上一行的规则5共用）和唯一值数（规则2）
+            processed_vals = []
+            num_count = 0
+            for v in row_values:
+                if v is None:
+                    continue
+                val = str(v).strip()
+                if not val:
+                    continue
+                processed_vals.append(val)
+                if is_number(val):
+                    num_count += 1
+            # 整行拼接后一次性统计中文字符，代替逐字符比较
+            joined = "".join(processed_vals)
             scan_rows.append(
                 {
                     "r_idx": r_idx - 1,  # 原始返回的是0开始的索引
                     "raw_values": row_values,
                     "processed": processed_vals,
                     "non_blank_count": len(processed_vals),
+                    "unique_count": len(set(processed_vals)),
+                    "num_count": num_count,
+                    "chinese_count": len(count_chinese(joined)),
+                    "char_count": len(joined),
                 }
             )
             if len(row_values) > max_row_value_count:
@@ -288,9 +324,15 @@ class ExcelReader(Step):
         # 不对单列数据进行处理
         if max_row_value_count < 2:
             return -1
+        # 列数取扫描行的最大宽度，不依赖需要完整解析的 sheet.max_column
+        ncols = max_row_value_count
 
         # 遍历每一行，计算综合评分
         header_scores = []
+        n_scan_rows = len(scan_rows)
+        if header_candidates:
+            candidates_lower = [c.lower().strip() for c in header_candidates]
+            n_candidates = len(candidates_lower)
         for row_data in scan_rows:
             r_idx = row_data["r_idx"]
             raw_vals = row_data["raw_values"]
@@ -305,30 +347,33 @@ class ExcelReader(Step):
                 continue
             score += 1.0  # 满足空值比例，基础分
 
+            # 规则6前置：关键字全部命中即为表头，无需再计算其他规则
+            if header_candidates:
+                # 单元格文本每行只规整一次，不再按候选词重复 lower/strip
+                cell_texts = [str(v).lower().strip() for v in raw_vals if v is not None]
+                matched_count = 0
+                for candidate_lower in candidates_lower:
+                    # 模糊匹配：候选词在单元格值中（忽略大小写）
+                    if any(candidate_lower in text for text in cell_texts):
+                        matched_count += 1
+                if matched_count == n_candidates:
+                    return r_idx
+
             # 规则2：唯一值比例（表头通常唯一值多）
-            unique_vals = set(processed_vals)
             unique_ratio = (
-                len(unique_vals) / len(processed_vals) if processed_vals else 0.0
+                row_data["unique_count"] / len(processed_vals) if processed_vals else 0.0
             )
             score += unique_ratio * 1.0  # 权重1.0
 
             # 规则3：数字占比（表头通常数字少，数据行数字多）
-            num_count = 0
-            for val in processed_vals:
-                # 判断是否为纯数字（整数/小数，排除身份证等长数字字符串）
-                if (
-                    re.match(r"^-?\d+(\.\d+)?$", val) and len(val) <= 15
-                ):  # 15位以内纯数字视为数值
-                    num_count += 1
-            num_ratio = num_count / len(processed_vals) if processed_vals else 1.0
+            num_ratio = (
+                row_data["num_count"] / len(processed_vals) if processed_vals else 1.0
+            )
             score += (1 - num_ratio) * 1.5  # 数字占比越低，得分越高，权重1.5
 
             # 规则4：中文字符占比（表头通常包含中文，数据行可能少）
-            chinese_count = 0
-            for val in processed_vals:
-                chinese_count += sum(1 for c in val if "\u4e00" <= c <= "\u9fff")
             chinese_ratio = (
-                chinese_count / sum(len(val) for val in processed_vals)
+                row_data["chinese_count"] / row_data["char_count"]
                 if processed_vals
                 else 0.0
             )
@@ -337,37 +382,23 @@ class ExcelReader(Step):
             # 规则5：下方行的数据验证（表头下方应该是数据行，满足数据特征）
             # 取当前行下一行（如果存在），判断是否为数据行（数字占比高、非空）
             next_row_idx = r_idx + 1
-            if next_row_idx < len(scan_rows):
+            if next_row_idx < n_scan_rows:
                 next_row = scan_rows[next_row_idx]
                 next_processed = next_row["processed"]
                 next_non_blank = next_row["non_blank_count"]
-                if next_non_blank / ncols >= (1 - blanks_ratio):  # 下一行非空比例足够
-                    # 计算下一行的数字占比
-                    next_num_count = 0
-                    for val in next_processed:
-                        if re.match(r"^-?\d+(\.\d+)?$", val) and len(val) <= 15:
-                            next_num_count += 1
+                if next_non_blank / ncols >= min_non_blank_ratio:  # 下一行非空比例足够
+                    # 下一行的数字占比
                     next_num_ratio = (
-                        next_num_count / len(next_processed) if next_processed else 0.0
+                        next_row["num_count"] / len(next_processed)
+                        if next_processed
+                        else 0.0
                     )
                     if next_num_ratio > 0.5:  # 下一行数字占比超过50%，视为数据行
                         score += 1.5  # 权重1.5
 
             # 规则6：关键字模糊匹配（如果有候选关键字）
             if header_candidates:
-                matched_count = 0
-                for candidate in header_candidates:
-                    candidate_lower = candidate.lower().strip()
-                    # 模糊匹配：候选词在单元格值中（忽略大小写）
-                    if any(
-                        candidate_lower in str(v).lower().strip()
-                        for v in raw_vals
-                        if v is not None
-                    ):
-                        matched_count += 1
-                match_ratio = (
-                    matched_count / len(header_candidates) if header_candidates else 0.0
-                )
+                match_ratio = matched_count / n_candidates
                 if match_ratio >= fuzzy_match_threshold:
                     score += match_ratio * 3.0  # 权重3.0（关键字匹配优先级最高）
                 else:
@@ -1,25 +1,113 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import functools
 import logging
+import mmap
+import multiprocessing
+import os
 from pathlib import Path
 import re
-from typing import AsyncGenerator, Optional
+from typing import TYPE_CHECKING, AsyncGenerator, Optional
 
-from bs4 import BeautifulSoup
-import chardet
-import extract_msg
-from msg_parser import MsOxMessage
-from markdownify import markdownify as md
 from typing_extensions import Generator
 
 from ..config.profile_manager import ProfileManager
 from ..pipeline import StepResult
 from .email import EmailReader
 
+# 解析相关的库较重，在实际处理msg文件时再导入
+if TYPE_CHECKING:
+    import extract_msg
+
 
 logger = logging.getLogger(__name__)
 
+# chardet 自动检测时最多读取的字节数，避免内嵌图片的大正文拖慢检测
+CHARDET_MAX_BYTES = 64 * 1024
+
+# Excel文件扩展名
+EXCEL_EXTENSIONS = frozenset({'.xls', '.xlsx'})
+
+# 查找 <meta charset> 时扫描的HTML前缀字节数
+META_SCAN_BYTES = 4096
+
+# 字符集匹配规则，HTML正文直接按bytes匹配
+_META_CHARSET_PATTERN = re.compile(rb'<meta[^>]+charset=["\']?([\w-]+)', re.IGNORECASE)
+_HEADER_CHARSET_PATTERN = re.compile(r'charset=([\w-]+)', re.IGNORECASE)
+# 文件名中不允许出现的字符(参照 attachment.save 的文件名处理，覆盖Windows的非法字符)
+_INVALID_FILENAME_PATTERN = re.compile(r'[\\/:*?"<>|\x00-\x1f]')
+# 内嵌的 base64 图片(data URI)，转换正文前去掉
+_DATA_URI_PATTERN = re.compile(r'src\s*=\s*(["\'])data:[^"\']*\1', re.IGNORECASE)
+
+# 单个附件的大小上限(MB)，超过则跳过保存，可通过环境变量 MSG_MAX_ATTACHMENT_MB 配置
+MAX_ATTACHMENT_BYTES = int(os.environ.get("MSG_MAX_ATTACHMENT_MB", "50")) * 1024 * 1024
+
+
+def _default_workers() -> int:
+    """并行处理msg文件的进程数，可通过环境变量 MSG_READER_WORKERS 配置"""
+    workers = os.environ.get("MSG_READER_WORKERS")
+    if workers:
+        return max(int(workers), 1)
+    return max((os.cpu_count() or 2) - 1, 1)
+
+
+@functools.cache
+def _markdown_converter():
+    """复用同一个markdown转换器，图片不输出到正文(样式和脚本的内容markdownify默认不输出)"""
+    from markdownify import MarkdownConverter
+
+    return MarkdownConverter(strip=['img'])
+
+
+def _html_to_markdown(html_body: bytes | str) -> str:
+    """HTML正文转markdown，先去掉内嵌图片，避免markdownify遍历巨大的属性值"""
+    if isinstance(html_body, bytes):
+        html_body = html_body.decode('utf-8', errors='ignore')
+    return _markdown_converter().convert(_DATA_URI_PATTERN.sub('', html_body))
+
+
+def _sanitize_filename(filename: str) -> str:
+    """去掉附件名中的路径和非法字符，避免写到附件目录之外或在Windows下无法创建"""
+    # 同时按 / 和 \ 取最后一段，Path 在POSIX下不会把 \ 当作分隔符
+    filename = re.split(r'[\\/]', filename)[-1]
+    filename = _INVALID_FILENAME_PATTERN.sub('_', filename).strip(' .')
+    return filename or "attachment"
+
+
+def _unique_filenames(filenames: list[str]) -> list[str]:
+    """同名附件追加序号(name_1.xlsx、name_2.xlsx…)，保证并发写盘时各自写到不同的文件"""
+    seen: set[str] = set()
+    unique = []
+    for filename in filenames:
+        stem, suffix = os.path.splitext(filename)
+        candidate, index = filename, 1
+        # 按不区分大小写比较，Windows下大小写不同的文件名也是同一个文件
+        while candidate.lower() in seen:
+            candidate = f"{stem}_{index}{suffix}"
+            index += 1
+        seen.add(candidate.lower())
+        unique.append(candidate)
+    return unique
+
+
 class MSGReader(EmailReader):
     """处理msg邮件文件，提取正文内容"""
 
+    def __init__(self, source_dir: str = "source", processing_dir: str = "processing",
+                 max_workers: Optional[int] = None, use_multiprocessing: bool = True):
+        """
+        初始化msg邮件处理器
+
+        Args:
+            source_dir: 源文件目录路径
+            processing_dir: 处理后文件保存目录路径
+            max_workers: 并行处理的进程数，默认取 MSG_READER_WORKERS 或 CPU核数-1
+            use_multiprocessing: 是否使用多进程处理(机械硬盘上并行读取可能更慢)
+        """
+        super().__init__(source_dir, processing_dir)
+        self.max_workers = max_workers or _default_workers()
+        self.use_multiprocessing = use_multiprocessing
+
     async def run(self, profile_manager: ProfileManager) -> AsyncGenerator[StepResult, None]:
         """处理source目录下的所有eml和msg文件"""
         # 获取所有msg文件
@@ -27,12 +115,31 @@ class MSGReader(EmailReader):
         msg_files = self.source_files(self.source_dir, "*.msg")
         logger.info(f"找到 {len(msg_files)} 个msg文件")
 
-        for msg_fp in msg_files:
-            step_result = await self._process_msg_file(msg_fp)
-            if step_result:
-                yield step_result
+        if not self.use_multiprocessing or self.max_workers <= 1 or len(msg_files) <= 1:
+            for msg_fp in msg_files:
+                # 解析和出错时的文件移动都是阻塞操作，放到线程中执行，不阻塞事件循环
+                step_result = await asyncio.to_thread(self._process_msg_file, msg_fp)
+                if step_result:
+                    yield step_result
+            return
+
+        # 每个msg文件相互独立，且解析为CPU密集型，按文件分发到进程池
+        loop = asyncio.get_running_loop()
+        # 用spawn启动子进程，避免在已有线程(事件循环、线程池)的进程中fork
+        pool = ProcessPoolExecutor(max_workers=min(self.max_workers, len(msg_files)),
+                                   mp_context=multiprocessing.get_context("spawn"))
+        try:
+            futures = [loop.run_in_executor(pool, self._process_msg_file, msg_fp) for msg_fp in msg_files]
+            # 按完成顺序产出，后续步骤不必等待排在前面的大文件
+            for future in asyncio.as_completed(futures):
+                step_result = await future
+                if step_result:
+                    yield step_result
+        finally:
+            # 不等待进程池退出：任务被取消或生成器提前关闭时，未开始的文件直接取消，不阻塞事件循环
+            pool.shutdown(wait=False, cancel_futures=True)
 
-    async def _process_msg_file(self, msg_file_path: Path) -> StepResult | None:
+    def _process_msg_file(self, msg_file_path: Path) -> StepResult | None:
         """
         处理单个msg文件
         
@@ -42,37 +149,33 @@ class MSGReader(EmailReader):
         Returns:
             StepResult | None: 处理结果(包含txt文件路径和Excel附件列表)，如果出错则为None
         """
+        import extract_msg
+
         try:
-            # 使用extract-msg处理msg文件
-            msg_obj = extract_msg.Message(msg_file_path)
-            
-            # 提取正文（优先获取HTML，然后是纯文本）
-            body = None
-            try:
-                htmlBody = msg_obj.htmlBody
-                if not htmlBody:
-                    body = msg_obj.body.decode('utf-8', errors='ignore')  # pyright: ignore[reportAttributeAccessIssue, reportOptionalMemberAccess]
-                else:
-                    body = md(htmlBody.decode('utf-8', errors='ignore'))
-            except UnicodeDecodeError:
-                
-                msg_obj2 = MsOxMessage(msg_file_path)
-                msg_properties = msg_obj2.get_properties()
-                if 'Body' in msg_properties:
-                    body = msg_properties['Body']
-                if 'HtmlBody' in msg_properties:
-                    htmlBody = msg_properties['HtmlBody']
-                    body = md(htmlBody)   
-            finally:
-                msg_obj.close()
+            # 内存映射msg文件交给extract-msg解析，一次性读出正文和附件数据后立即关闭，
+            # 后续的markdown转换和写盘都不再占用msg文件句柄
+            with open(msg_file_path, 'rb') as f, \
+                 mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                msg_obj = extract_msg.Message(mm)
+                try:
+                    html_body, text_body, decode_failed = None, None, False
+                    try:
+                        html_body = msg_obj.htmlBody
+                        text_body = None if html_body else msg_obj.body
+                    except UnicodeDecodeError:
+                        # 交给msg_parser重新读取
+                        decode_failed = True
+                    excel_attachments = self._collect_excel_attachments(msg_obj)
+                finally:
+                    msg_obj.close()
 
+            body = self._extract_body(html_body, text_body, msg_file_path, decode_failed)
 
             # 保存为txt文件
-            text_file = self._save_text_file(body, msg_file_path.stem)   # pyright: ignore[reportArgumentType]
-            
-            msg_obj = extract_msg.Message(msg_file_path)
-            # 提取并保存Excel附件
-            attachments = self._extract_excel_attachments_from_msg(msg_obj, msg_file_path.stem)
+            text_file = self._save_text_file(body, msg_file_path.stem)
+
+            # 保存Excel附件
+            attachments = self._save_excel_attachments(excel_attachments, msg_file_path.stem)
 
             logger.info(f"成功处理msg文件: {msg_file_path.name}")
             return text_file, attachments
@@ -81,84 +184,152 @@ class MSGReader(EmailReader):
             logger.error(f"处理msg文件 {msg_file_path.name} 时出错: {str(e)}")
             
             # 移动到error目录
-            error_dir = self.source_dir.parent / "error"
-            error_dir.mkdir(exist_ok=True)
-            msg_file_path.rename(error_dir / msg_file_path.name)
+            self.error_dir.mkdir(exist_ok=True)
+            msg_file_path.rename(self.error_dir / msg_file_path.name)
             return None
     
-    def _extract_excel_attachments_from_msg(self, msg_obj: extract_msg.Message, email_filename: str) -> Optional[list[str]]:
+    def _extract_body(self, html_body, text_body, msg_file_path: Path, decode_failed: bool = False) -> str:
+        """
+        提取msg邮件正文（优先获取HTML，然后是纯文本）
+
+        Args:
+            html_body: 从msg中读出的HTML正文
+            text_body: 从msg中读出的纯文本正文(仅在没有HTML正文时读取)
+            msg_file_path: msg文件路径，解码失败时用msg_parser重新读取
+            decode_failed: extract-msg读取正文时是否已解码失败
+
+        Returns:
+            str: 邮件正文内容(没有正文时为空字符串)
         """
-        从msg文件中提取Excel附件并保存到指定目录
+        if decode_failed:
+            return self._extract_body_with_msg_parser(msg_file_path)
+        try:
+            if not html_body:
+                # extract-msg 的纯文本正文通常已是 str，只有 bytes 时才需要解码
+                if isinstance(text_body, bytes):
+                    return text_body.decode('utf-8', errors='ignore')
+                return text_body or ""
+            return _html_to_markdown(html_body)
+        except UnicodeDecodeError:
+            return self._extract_body_with_msg_parser(msg_file_path)
+
+    def _extract_body_with_msg_parser(self, msg_file_path: Path) -> str:
+        """extract-msg解码失败时，用msg_parser重新读取正文"""
+        from msg_parser import MsOxMessage
+
+        body = ""
+        msg_obj2 = MsOxMessage(msg_file_path)
+        msg_properties = msg_obj2.get_properties()
+        if 'Body' in msg_properties:
+            body = msg_properties['Body']
+        if 'HtmlBody' in msg_properties:
+            htmlBody = msg_properties['HtmlBody']
+            body = _html_to_markdown(htmlBody)
+        return body
+
+    def _collect_excel_attachments(self, msg_obj: "extract_msg.Message") -> list[tuple[str, bytes]]:
+        """
+        读出msg文件中的Excel附件数据
         
         Args:
             msg_obj: extract_msg.Message对象
+            
+        Returns:
+            list[tuple[str, bytes]]: (附件名称, 附件数据)列表
+        """
+        excel_attachments = []
+        # 遍历附件
+        for attachment in msg_obj.attachments or []:
+            try:
+                # 获取附件名称
+                attachment_name = attachment.longFilename or attachment.shortFilename
+                # 检查文件是否为Excel文件
+                if attachment_name and os.path.splitext(attachment_name)[1].lower() in EXCEL_EXTENSIONS:
+                    # 跳过超大附件，避免写出和后续解析占用过多内存
+                    attachment_data = attachment.data or b""
+                    if len(attachment_data) > MAX_ATTACHMENT_BYTES:
+                        logger.warning(f"msg附件 {attachment_name} 大小 {len(attachment_data)} 超过上限 {MAX_ATTACHMENT_BYTES}，已跳过")
+                        continue
+                    excel_attachments.append((attachment_name, attachment_data))
+            except Exception as e:
+                logger.error(f"处理msg附件时出错: {str(e)}")
+                continue
+        return excel_attachments
+
+    def _save_excel_attachments(self, excel_attachments: list[tuple[str, bytes]], email_filename: str) -> Optional[list[str]]:
+        """
+        将Excel附件保存到指定目录
+        
+        Args:
+            excel_attachments: (附件名称, 附件数据)列表
             email_filename: 原始邮件文件名(不含扩展名)
             
         Returns:
             Optional[list[str]]: 提取到的Excel附件文件名列表(如果有)，否则为None
         """
-  
-        # 获取附件
-        attachments = msg_obj.attachments
-        if attachments:
-            # 创建与邮件文件同名的目录
-            attachments_dir = self.processing_dir / email_filename
-                            
-            # Excel文件扩展名列表
-            excel_extensions = ['.xls', '.xlsx']
-            saved_attachments = []
-            # 遍历附件
-            for attachment in attachments:
-                try:
-                    # 获取附件名称
-                    attachment_name = attachment.longFilename if attachment.longFilename else attachment.shortFilename
-                    # 检查文件是否为Excel文件
-                    if attachment_name and any(attachment_name.lower().endswith(ext) for ext in excel_extensions):
-                        attachments_dir.mkdir(exist_ok=True)
-                        # 保存附件到指定目录
-                        # attachment_path = attachments_dir / attachment_name
-                        attachment.save(customPath=str(attachments_dir))
-                        saved_attachments.append(attachments_dir / attachment_name)
-                        logger.info(f"已保存msg文件中的Excel附件: {attachment_name} 到 {attachments_dir.name}")
-                except Exception as e:
-                    logger.error(f"处理msg附件时出错: {str(e)}")
-                    continue
-            
-            # 返回保存的Excel附件文件名列表
-            if len(saved_attachments) > 0:
-                return saved_attachments
-            else:
+        if not excel_attachments:
+            return None
+
+        # 创建与邮件文件同名的目录
+        attachments_dir = self.processing_dir / email_filename
+        attachments_dir.mkdir(exist_ok=True)
+
+        # 提交写盘前先确定各附件的目标文件名
+        target_names = _unique_filenames([_sanitize_filename(name) for name, _ in excel_attachments])
+
+        def save_attachment(item) -> Optional[Path]:
+            (attachment_name, attachment_data), target_name = item
+            try:
+                attachment_path = attachments_dir / target_name
+                with open(attachment_path, 'wb') as fp:
+                    fp.write(attachment_data)
+                logger.info(f"已保存msg文件中的Excel附件: {attachment_name} 到 {attachments_dir.name}")
+                return attachment_path
+            except Exception as e:
+                logger.error(f"处理msg附件时出错: {str(e)}")
                 return None
 
+        # 多个附件并发写盘，耗时趋近于最大的单个附件
+        items = list(zip(excel_attachments, target_names))
+        if len(items) == 1:
+            saved = [save_attachment(items[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=len(items)) as pool:
+                saved = list(pool.map(save_attachment, items))
+        saved_attachments = [path for path in saved if path is not None]
+
+        # 返回保存的Excel附件文件名列表
+        if len(saved_attachments) > 0:
+            return saved_attachments
+        else:
+            return None
+
     def _get_html_charset(self, msg):
-        html_body = msg.getSaveHtmlBody(charset='latin-1')
-        # 1. 从 HTML meta 标签提取
-        soup = BeautifulSoup(html_body, "html.parser")
-        meta_tag = soup.find("meta", attrs={"http-equiv": "Content-Type"}) or soup.find("meta", attrs={"charset": True})
         charset = None
-        if meta_tag:
-            if "http-equiv" in meta_tag.attrs:  # pyright: ignore[reportAttributeAccessIssue]
-                content = meta_tag.get("content", "")  # pyright: ignore[reportAttributeAccessIssue]
-                charset_match = re.search(r'charset=([\w-]+)', content, re.IGNORECASE)  # pyright: ignore[reportCallIssue, reportArgumentType]
-                if charset_match:
-                    charset = charset_match.group(1).strip()
-            else:
-                charset = meta_tag.get("charset", "").strip()  # pyright: ignore[reportAttributeAccessIssue, reportOptionalMemberAccess]
-
-        # 2. 从邮件头提取
-        if not charset:
-            content_type = msg.header.get("Content-Type", "")
-            header_match = re.search(r'charset=([\w-]+)', content_type, re.IGNORECASE)
-            if header_match:
-                charset = header_match.group(1).strip()
+        # 1. 从邮件头提取（多数邮件都会声明，无需读取正文）
+        content_type = msg.header.get("Content-Type", "")
+        header_match = _HEADER_CHARSET_PATTERN.search(content_type)
+        if header_match:
+            charset = header_match.group(1).strip()
 
-        # 3. 自动检测
         if not charset:
+            html_body = msg.getSaveHtmlBody(charset='latin-1')
             if isinstance(html_body, str):
                 html_bytes = html_body.encode("latin-1")
             else:
                 html_bytes = html_body
-            detected = chardet.detect(html_bytes)
-            charset = detected["encoding"]
+
+            # 2. 从 HTML meta 标签提取(meta 位于 head 中，只扫描开头部分，不构建整棵 DOM 树)
+            meta_match = _META_CHARSET_PATTERN.search(html_bytes, 0, META_SCAN_BYTES)
+            if meta_match:
+                charset = meta_match.group(1).decode("ascii").strip()
+
+            # 3. 自动检测
+            if not charset:
+                import chardet
+
+                # 只取前缀检测，耗时与正文大小无关
+                detected = chardet.detect(html_bytes[:CHARDET_MAX_BYTES])
+                charset = detected["encoding"]
 
         return charset.lower() if charset else "utf-8"  # 默认 utf-8
@@ -3,18 +3,24 @@ UI module for the info_extract project.
 Provides a web interface for configuring the info_item table in standard.db and
 managing file processing tasks.
 """
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
 import logging
-from threading import Timer
+import os
+import sys
 import threading
 from pathlib import Path
 from typing import Dict, Tuple
 import webbrowser
 
-from fastapi import FastAPI, Response
+import anyio
+from fastapi import FastAPI, Request, Response
 from fastapi.concurrency import asynccontextmanager
-from fastapi.responses import HTMLResponse, FileResponse, JSONResponse, StreamingResponse
+from fastapi.responses import HTMLResponse, FileResponse, ORJSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.openapi.docs import get_swagger_ui_html
 
 from .executor import Executor
@@ -23,6 +29,26 @@ from .route import task_router, config_router
 
 logger = logging.getLogger(__name__)
 
+# 页面及图标文件在启动时读入内存，按内容计算ETag
+STATIC_PAGES = ('main.html', 'info_item.html', 'mark_extracts.html', 'favicon.png')
+
+# Server-sent event routes, never compressed so every frame is flushed as soon as it is sent
+SSE_PATHS = frozenset({'/api/tasks/stream'})
+
+
+class SSEAwareGZipMiddleware(GZipMiddleware):
+    """GZipMiddleware that passes the progress stream through untouched.
+
+    Older Starlette releases (still allowed by the fastapi requirement) buffer
+    text/event-stream responses in the gzip stream, which holds back progress frames.
+    """
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] in SSE_PATHS:
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
 
 class UI:
     """
@@ -31,12 +57,20 @@ class UI:
     and to process files through the pipeline.
     """
 
-    def __init__(self, host:str = "127.0.0.1", port:int = 5000,db_path: str|None = None, work_dir:str = "./workdir"):
+    # Every UI registers the same routes, so the generated OpenAPI schema is shared
+    _openapi_schema: dict | None = None
+
+    def __init__(self, host:str = "127.0.0.1", port:int = 5000,db_path: str|None = None, work_dir:str = "./workdir",
+                 max_thread_workers: int|None = None, cors_enabled: bool = True):
         """
         Initialize the UI instance.
 
         Args:
             db_path: Path to the SQLite database. If None, uses default path.
+            max_thread_workers: Threads available to blocking handlers and to_thread calls.
+                If None, uses the ThreadPoolExecutor default.
+            cors_enabled: Install the CORS middleware. Tests that do not check CORS
+                turn it off to skip it on every request.
         """
 
         @asynccontextmanager
@@ -50,8 +84,13 @@ class UI:
                     print(f"⚠️ 无法自动打开浏览器: {e}")
                     print(f"请手动访问: {url}")
             
-            # 延迟0.5秒确保服务器就绪
-            Timer(0.5, open_browser).start()
+            loop = asyncio.get_running_loop()
+            # 限制阻塞处理使用的线程数，避免与流水线自身的进程/线程池争抢CPU
+            loop.set_default_executor(ThreadPoolExecutor(max_workers=self._max_thread_workers))
+            anyio.to_thread.current_default_thread_limiter().total_tokens = self._max_thread_workers
+
+            # 延迟0.5秒确保服务器就绪(由事件循环调度，无需单独开线程)
+            loop.call_later(0.5, open_browser)
         
             # Initialize the profile manager and make it available to the UI
             from .config import profile_manager
@@ -68,6 +107,7 @@ class UI:
         self.app = FastAPI(title="Info Extract UI",
                            description="Web interface for info extract project",
                            lifespan=lifespan,
+                           default_response_class=ORJSONResponse,
                            docs_url=None)
 
 
@@ -75,24 +115,68 @@ class UI:
         self.template_dir = Path(__file__).parent / "web"
         print("template dir", self.template_dir)
 
+        self._static_cache = self._load_static_cache()
+
         # Mount static files
-        self.app.mount("/static", StaticFiles(directory=str(self.template_dir)), name="static")
+        self.app.mount("/static", StaticFiles(directory=str(self.template_dir), check_dir=False), name="static")
+
+        # Compress JSON list responses; the progress stream is excluded explicitly
+        self.app.add_middleware(SSEAwareGZipMiddleware, minimum_size=500, compresslevel=5)
 
         # Add CORS middleware
-        self.app.add_middleware(
-            CORSMiddleware,
-            allow_origins=["*"],
-            allow_credentials=True,
-            allow_methods=["*"],
-            allow_headers=["*"],
-        )
+        # The UI is served from this server itself, so only its own origin is allowed;
+        # max_age lets browsers cache preflight results for PUT/DELETE/JSON requests
+        if cors_enabled:
+            self.app.add_middleware(
+                CORSMiddleware,
+                allow_origins=[f"http://{host}:{port}", f"http://localhost:{port}"],
+                allow_credentials=True,
+                allow_methods=["GET", "POST", "PUT", "DELETE", "HEAD"],
+                allow_headers=["content-type", "accept"],
+                max_age=86400,
+            )
 
         self._host = host
         self._port = port
+        self._max_thread_workers = max_thread_workers or min(32, (os.cpu_count() or 1) + 4)
 
         self._setup_routes()
+        self._share_openapi_schema()
+
+    def _share_openapi_schema(self):
+        """Generate the OpenAPI schema once per process instead of once per app."""
+        generate = self.app.openapi
+
+        def openapi() -> dict:
+            if self.app.openapi_schema is None:
+                if UI._openapi_schema is None:
+                    UI._openapi_schema = generate()
+                self.app.openapi_schema = UI._openapi_schema
+            return self.app.openapi_schema
+
+        self.app.openapi = openapi
+
+    def _load_static_cache(self) -> Dict[str, Tuple[bytes, str]]:
+        """Read the UI pages and favicon once, keyed by file name with their ETag."""
+        cache = {}
+        for name in STATIC_PAGES:
+            path = self.template_dir / name
+            if path.is_file():
+                content = path.read_bytes()
+                cache[name] = (content, f'"{hashlib.sha1(content).hexdigest()}"')
+        return cache
+
+    def _cached_response(self, request: Request, name: str, media_type: str, max_age: int = 300) -> Response | None:
+        """Serve a cached file, answering 304 when the client already has it."""
+        cached = self._static_cache.get(name)
+        if cached is None:
+            return None
+        content, etag = cached
+        headers = {"ETag": etag, "Cache-Control": f"public, max-age={max_age}"}
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
+        return Response(content=content, media_type=media_type, headers=headers)
 
-    
     def _setup_routes(self):
         """Set up the FastAPI routes for the UI."""
         
@@ -108,12 +192,13 @@ class UI:
             )
 
         @self.app.get('/favicon.ico')
-        async def favicon():
-            favicon_path = self.template_dir / 'favicon.png'
-            if favicon_path.exists():
-                return FileResponse(str(favicon_path))
+        async def favicon(request: Request):
+            # The icon does not change between releases, let browsers keep it for a day
+            response = self._cached_response(request, 'favicon.png', "image/png", max_age=86400)
+            if response is not None:
+                return response
             else:
-                return JSONResponse(content={'error': 'Favicon not found'}, status_code=404)
+                return ORJSONResponse(content={'error': 'Favicon not found'}, status_code=404)
     
         @self.app.head("/", include_in_schema=False)  # Hide from API docs
         async def health_check():
@@ -123,30 +208,30 @@ class UI:
             )
 
         @self.app.get('/config/info_item_list', response_class=HTMLResponse)
-        async def serve_config_ui():
+        async def serve_config_ui(request: Request):
             """Serve the configuration UI page."""
-            config_ui_path = self.template_dir / 'info_item.html'
-            if config_ui_path.exists():
-                return FileResponse(str(config_ui_path), media_type="text/html")
+            response = self._cached_response(request, 'info_item.html', "text/html")
+            if response is not None:
+                return response
             else:
                 return HTMLResponse(content="Configuration UI not found", status_code=404)
         
         @self.app.get('/config/mark_extracts', response_class=HTMLResponse)
-        async def serve_mark_extracts_ui():
+        async def serve_mark_extracts_ui(request: Request):
             """Serve the configuration UI page."""
-            config_ui_path = self.template_dir / 'mark_extracts.html'
-            if config_ui_path.exists():
-                return FileResponse(str(config_ui_path), media_type="text/html")
+            response = self._cached_response(request, 'mark_extracts.html', "text/html")
+            if response is not None:
+                return response
             else:
                 return HTMLResponse(content="Mark Extracts UI not found", status_code=404)
 
         # Main UI routes
         @self.app.get('/', response_class=HTMLResponse)
-        async def serve_main_ui():
+        async def serve_main_ui(request: Request):
             """Serve the main UI page."""
-            main_ui_path = self.template_dir / 'main.html'
-            if main_ui_path.exists():
-                return FileResponse(str(main_ui_path), media_type="text/html")
+            response = self._cached_response(request, 'main.html', "text/html")
+            if response is not None:
+                return response
             else:
                 return HTMLResponse(content="Main UI not found", status_code=404)
 
@@ -160,5 +245,8 @@ class UI:
     def run(self):
         """Run the FastAPI app using uvicorn."""
         import uvicorn
-        uvicorn.run(self.app, host=self._host, port=self._port)
+        # uvloop 不支持 Windows，其余平台使用以降低事件循环开销；httptools 各平台均可用
+        loop = "uvloop" if sys.platform != 'win32' else "auto"
+        uvicorn.run(self.app, host=self._host, port=self._port,
+                    loop=loop, http="httptools", workers=1)
 
@@ -1,11 +1,14 @@
-from .use_layout_view import classify_excel_sheets
-from .excel import excel_to_png_via_com
-from .image2json import batch_recognize, recognize_image
+from .use_layout_view import classify_excel_sheets, classify_excel_sheets_many
+from .excel import ExcelSession, excel_to_png_via_com
+from .image2json import batch_recognize, recognize_image, responses_to_frame
 
 __all__ = [
     "classify_excel_sheets",
+    "classify_excel_sheets_many",
     "excel_to_png_via_com",
+    "ExcelSession",
     # image2json exports
     "batch_recognize",
     "recognize_image",
+    "responses_to_frame",
 ]
@@ -7,14 +7,56 @@ import logging
 import pythoncom
 import win32com.client
 from PIL import Image
-import tempfile
 
 
 logger = logging.getLogger(__name__)
 
 
+class ExcelSession:
+    """
+    Excel应用会话，多次转换复用同一个Excel进程，避免每次都启动和退出Excel
+
+    Usage:
+        with ExcelSession() as session:
+            for sheet_name in sheet_names:
+                excel_to_png_via_com(excel_file, png_path, sheet_name, session=session)
+    """
+
+    def __init__(self):
+        self._app = None
+
+    def __enter__(self):
+        # 初始化COM库
+        pythoncom.CoInitialize()
+        return self
+
+    @property
+    def app(self):
+        """Excel应用，首次使用时启动"""
+        if self._app is None:
+            app = win32com.client.Dispatch("Excel.Application")
+            app.Visible = False
+            app.DisplayAlerts = False
+            self._app = app
+        return self._app
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # 清理资源
+        try:
+            if self._app:
+                self._app.Quit()
+        finally:
+            self._app = None
+
+            # 反初始化COM库
+            try:
+                pythoncom.CoUninitialize()
+            except:
+                pass  # 如果已经反初始化，则忽略错误
+
+
 def excel_to_png_via_com(
-    excel_file_path, output_png_path, sheet_name=None, width=0, height=0
+    excel_file_path, output_png_path, sheet_name=None, width=0, height=0, session=None
 ):
     """
     使用COM组件将Excel转换为PNG图片
@@ -25,23 +67,23 @@ def excel_to_png_via_com(
         sheet_name (str, optional): 指定工作表名称，默认为第一个工作表
         width (int, optional): 输出图片宽度，默认自适应
         height (int, optional): 输出图片高度，默认自适应
+        session (ExcelSession, optional): 已打开的Excel会话，默认单独启动一个Excel
     """
+    if session is None:
+        with ExcelSession() as session:
+            return _excel_to_png(session, excel_file_path, output_png_path, sheet_name, width, height)
+    return _excel_to_png(session, excel_file_path, output_png_path, sheet_name, width, height)
+
+
+def _excel_to_png(session, excel_file_path, output_png_path, sheet_name, width, height):
     import win32clipboard
     import io
+    import struct
 
-    excel_app = None
-    temp_image_path = None
+    workbook = None
     try:
-        # 初始化COM库
-        pythoncom.CoInitialize()
-
-        # 启动Excel应用
-        excel_app = win32com.client.Dispatch("Excel.Application")
-        excel_app.Visible = False
-        excel_app.DisplayAlerts = False
-
-        # 打开工作簿
-        workbook = excel_app.Workbooks.Open(os.path.abspath(excel_file_path))
+        # 打开工作簿(Excel在此首次启动，启动失败同样记录日志)
+        workbook = session.app.Workbooks.Open(os.path.abspath(excel_file_path))
 
         # 选择工作表
         if sheet_name:
@@ -61,27 +103,14 @@ def excel_to_png_via_com(
                 # 获取DIB数据
                 dib_data = win32clipboard.GetClipboardData(win32clipboard.CF_DIB)
 
-                # 生成临时文件路径
-                temp_dir = tempfile.gettempdir()
-                temp_image_path = os.path.join(
-                    temp_dir, f"temp_{os.path.basename(output_png_path)}.bmp"
-                )
-
-                # 将DIB数据写入临时BMP文件
-                with open(temp_image_path, "wb") as f:
-                    # BMP文件头
-                    f.write(b"BM")  # 文件标识符
-                    f.write(
-                        (len(dib_data) + 54).to_bytes(4, byteorder="little")
-                    )  # 文件大小
-                    f.write(b"\x00\x00\x00\x00")  # 保留字段
-                    f.write((54).to_bytes(4, byteorder="little"))  # 偏移量到图像数据
-                    # 写入DIB数据
-                    f.write(dib_data)
+                # 在内存中拼接BMP文件头和DIB数据，不落地临时文件
+                # BMP文件头: 文件标识符、文件大小、保留字段、偏移量到图像数据
+                header = struct.pack("<2sIII", b"BM", len(dib_data) + 54, 0, 54)
+                buf = io.BytesIO(header + dib_data)
 
                 # 使用PIL调整图片尺寸（如果指定了宽高）
                 if width > 0 or height > 0:
-                    img = Image.open(temp_image_path)
+                    img = Image.open(buf)
                     original_width, original_height = img.size
 
                     if width > 0 and height > 0:
@@ -99,34 +128,19 @@ def excel_to_png_via_com(
                     resized_img.save(output_png_path, "PNG")
                 else:
                     # 直接将BMP转换为PNG
-                    img = Image.open(temp_image_path)
+                    img = Image.open(buf)
                     img.save(output_png_path, "PNG")
             else:
                 raise RuntimeError("未能从剪贴板获取图像数据")
         finally:
             win32clipboard.CloseClipboard()
 
-        workbook.Close(SaveChanges=False)
         logger.info(f"成功将{excel_file_path}转换为{output_png_path}")
 
     except Exception as e:
         logger.error(f"Excel转PNG过程中发生错误: {str(e)}")
         raise
     finally:
-        # 清理资源
-        if excel_app:
-            excel_app.Quit()
-            excel_app = None
-
-        # 删除临时文件
-        if temp_image_path and os.path.exists(temp_image_path):
-            try:
-                os.remove(temp_image_path)
-            except:
-                pass  # 忽略删除临时文件的错误
-
-        # 反初始化COM库
-        try:
-            pythoncom.CoUninitialize()
-        except:
-            pass  # 如果已经反初始化，则忽略错误
+        # Excel可能被复用，出错时也要关闭工作簿
+        if workbook is not None:
+            workbook.Close(SaveChanges=False)
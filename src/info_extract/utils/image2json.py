@@ -17,6 +17,7 @@ Usage:
 from __future__ import annotations
 
 import asyncio
+import functools
 import io
 import os
 import time
@@ -111,14 +112,18 @@ class RecognitionResponse(BaseModel):
     )
     metadata: dict = Field(default_factory=dict, description="额外元数据")
 
+    def to_row(self) -> dict | None:
+        """将识别响应转换为 {字段名: 值} 的单行数据"""
+        if self.form_data is None:
+            return None
+        return {field.name: field.value for field in self.form_data.fields}
+
     def to_pandas(self) -> pd.DataFrame | None:
         """将识别响应转换为Pandas DataFrame"""
-        if self.form_data is None:
+        row = self.to_row()
+        if row is None:
             return None
-        data = {}
-        for field in self.form_data.fields:
-            data[field.name] = field.value
-        return pd.DataFrame([data])
+        return pd.DataFrame([row])
 
 class ImageData:
     """图片数据内部类"""
@@ -139,6 +144,9 @@ class ImageProcessingConfig(BaseModel):
         default=10 * 1200 * 1200, description="最大文件大小（字节）"
     )
     max_image_size: int = Field(default=4096, description="最大边长（像素）")
+    max_pixels: int = Field(
+        default=4096 * 4096 * 4, description="最大像素数，超过则拒绝解码"
+    )
     jpeg_quality: int = Field(default=85, ge=1, le=100, description="JPEG压缩质量")
     supported_formats: list[str] = Field(
         default_factory=lambda: [".png", ".jpg", ".jpeg", ".bmp", ".webp"],
@@ -228,6 +236,24 @@ class ImageLoader:
                 original_size = img.size
                 original_format = img.format or "unknown"
 
+                # 打开时只读取了文件头，像素数过大的图片在解码前拒绝
+                if original_size[0] * original_size[1] > self.config.max_pixels:
+                    raise UnsupportedFormatError(
+                        f"图片尺寸 {original_size[0]}x{original_size[1]} 超过最大像素数 {self.config.max_pixels}"
+                    )
+
+                # 已是尺寸合规的RGB JPEG时直接使用原文件，不再解码和重新编码
+                if (
+                    original_format == "JPEG"
+                    and img.mode == "RGB"
+                    and max(original_size) <= self.config.max_image_size
+                ):
+                    return ImageData(
+                        data=Path(path).read_bytes(),
+                        original_size=original_size,
+                        format=original_format,
+                    )
+
                 # 预处理
                 processed = self._preprocess(img)
 
@@ -272,17 +298,21 @@ class ImageLoader:
         Returns:
             bytes: 处理后的图片字节数据
         """
-        # RGBA/P模式转换为RGB
-        if image.mode in ("RGBA", "P"):
-            image = image.convert("RGB")
-
         # 尺寸调整（保持比例，最大边不超过限制）
         width, height = image.size
         max_size = self.config.max_image_size
-
+        new_size = None
         if max(width, height) > max_size:
             ratio = max_size / max(width, height)
             new_size = (int(width * ratio), int(height * ratio))
+            # JPEG在解码时直接按1/2、1/4、1/8缩小(不小于目标尺寸)，其他格式无影响
+            image.draft("RGB", new_size)
+
+        # RGBA/P模式转换为RGB
+        if image.mode in ("RGBA", "P"):
+            image = image.convert("RGB")
+
+        if new_size is not None and image.size != new_size:
             image = image.resize(new_size, Image.Resampling.LANCZOS)
 
         # 保存为JPEG字节
@@ -349,8 +379,8 @@ class VisionFormAgent:
         start_time = time.time()
 
         try:
-            # 加载图片
-            image_data, media_type = self._load_image(image_path)
+            # 加载图片(解码、缩放和编码为CPU密集操作，放到线程中执行，与其他图片的模型调用并行)
+            image_data, media_type = await asyncio.to_thread(self._load_image, image_path)
 
             # 调用Agent进行识别
             result = await self.agent.run(
@@ -391,30 +421,23 @@ class ResultProcessor:
         Returns:
             处理后的FormSchema
         """
-        # 过滤低置信度字段
-        filtered_fields = self._filter_low_confidence(
-            raw_result.fields, confidence_threshold
-        )
-
-        # 数据清洗
-        cleaned = self._clean_data(filtered_fields)
+        # 过滤低置信度字段并清洗数据(单次遍历)
+        cleaned = self._clean_data(raw_result.fields, confidence_threshold)
 
-        return FormSchema(
+        # 字段均来自已校验的模型，跳过重复校验
+        return FormSchema.model_construct(
             title=raw_result.title,
             fields=cleaned,
         )
 
-    def _filter_low_confidence(
-        self, fields: list[FormField], threshold: float
-    ) -> list[FormField]:
-        """过滤低置信度字段"""
-        return [f for f in fields if f.confidence >= threshold]
-
-    def _clean_data(self, fields: list[FormField]) -> list[FormField]:
-        """清洗数据"""
+    def _clean_data(self, fields: list[FormField], threshold: float) -> list[FormField]:
+        """过滤低置信度字段并清洗数据"""
         cleaned_fields = []
 
         for field in fields:
+            if field.confidence < threshold:
+                continue
+
             # 去除空白字符
             cleaned_value = field.value.strip()
 
@@ -423,7 +446,7 @@ class ResultProcessor:
                 cleaned_value = cleaned_value.replace(",", "").replace(" ", "")
 
             # 创建清洗后的字段
-            cleaned_field = FormField(
+            cleaned_field = FormField.model_construct(
                 name=field.name.strip(),
                 value=cleaned_value,
                 field_type=field.field_type,
@@ -440,6 +463,14 @@ class ResultProcessor:
 # =============================================================================
 
 
+@functools.lru_cache(maxsize=8)
+def _get_agent(custom_prompt: Optional[str], model: str) -> VisionFormAgent:
+    """按Prompt和模型缓存VisionFormAgent，批量识别时复用同一个Agent及其HTTP连接"""
+    return VisionFormAgent(
+        custom_prompt=custom_prompt, config=VisionAgentConfig(model=model)
+    )
+
+
 async def recognize_image(
     image_path: str,
     confidence_threshold: float = 0.5,
@@ -462,10 +493,8 @@ async def recognize_image(
     start_time = time.time()
 
     try:
-        # 创建Agent
-        agent = VisionFormAgent(
-            custom_prompt=custom_prompt
-        )
+        # 获取Agent(按Prompt和模型复用)
+        agent = _get_agent(custom_prompt, VisionAgentConfig().model)
 
         # 执行识别
         form_data, processing_time = await agent.recognize(image_path)
@@ -563,6 +592,20 @@ async def batch_recognize(
 # =============================================================================
 # 便捷函数
 # =============================================================================
+def responses_to_frame(responses: list[RecognitionResponse]) -> pd.DataFrame:
+    """将多个识别结果合并为一个DataFrame（每个结果一行）
+
+    一次构建DataFrame，避免逐个 to_pandas 后再 pd.concat 的开销。
+
+    Args:
+        responses: 识别结果列表
+
+    Returns:
+        pd.DataFrame: 合并后的结果，未识别出表单数据的结果会被跳过
+    """
+    return pd.DataFrame([r.to_row() for r in responses if r.form_data is not None])
+
+
 def validate_image(image_path: str) -> tuple[bool, Optional[str]]:
     """验证图片文件
 
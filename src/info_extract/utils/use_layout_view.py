@@ -3,30 +3,32 @@ Python to use the Rust dynamic library for Excel sheet classification
 """
 
 import ctypes
-import json
+import functools
 import os
+from concurrent.futures import ThreadPoolExecutor
 from ctypes import c_char_p
 from pathlib import Path
 
+import orjson
 
+_ROOT_PATH = Path(__file__).parent.parent.parent
+
+
+@functools.cache
 def load_rust_library(root_path: Path):
     """
     Load the Rust dynamic library and set up function signatures
+
+    The loaded library is cached per root_path, so dlopen and the
+    signature setup only happen once per process.
     """
-    # Add the library directory to the system library path
     lib_dir = root_path / "config"
 
-    # On Linux, we may need to modify LD_LIBRARY_PATH
-    if os.name == "posix":
-        current_ld_path = os.environ.get("LD_LIBRARY_PATH", "")
-        new_ld_path = f"{lib_dir}:{current_ld_path}" if current_ld_path else lib_dir
-        # Note: setting LD_LIBRARY_PATH after the process starts has no effect on dlopen
-        # The environment variable must be set before the Python process starts
-        # Path to the dynamic library
-        lib_path = os.path.join(new_ld_path, "liblayout_view.so")
-    elif os.name == "nt":
-        new_ld_path = lib_dir
-        lib_path = os.path.join(new_ld_path, "layout_view.dll")
+    # LD_LIBRARY_PATH is only read at process start, so load by absolute path
+    if os.name == "nt":
+        lib_path = os.path.join(lib_dir, "layout_view.dll")
+    else:
+        lib_path = os.path.join(lib_dir, "liblayout_view.so")
 
     if not os.path.exists(lib_path):
         raise FileNotFoundError(f"Library not found: {lib_path}")
@@ -51,36 +53,26 @@ def classify_excel_sheets(xlsx_path):
     Classify Excel sheets using the Rust library
 
     Args:
-        xlsx_path (str): Path to the Excel file
+        xlsx_path (str | os.PathLike): Path to the Excel file
 
     Returns:
         list: List of classified sheets or None if error occurred
     """
-    lib = load_rust_library(Path(__file__).parent.parent.parent)
-
-    # Convert Python string to C string
-    c_path = ctypes.c_char_p(xlsx_path.encode("utf-8"))
+    lib = load_rust_library(_ROOT_PATH)
 
-    # Call the Rust function
-    result_ptr = lib.classify_excel_sheets_c(c_path)
+    # Call the Rust function, ctypes passes the encoded bytes as char*
+    result_ptr = lib.classify_excel_sheets_c(os.fsencode(xlsx_path))
 
     if not result_ptr:
         return None
 
     try:
-        # Convert the result to Python string
-        # Use ctypes.c_char_p(result_ptr).value to get the string value
-        result_bytes = ctypes.cast(result_ptr, ctypes.c_char_p).value
-        if result_bytes is None:
-            return None
+        # Copy the NUL-terminated result out of Rust memory
+        result_bytes = ctypes.string_at(result_ptr)
 
-        result_str = result_bytes.decode("utf-8")
-
-        # Parse the JSON result
-        parsed_result = json.loads(result_str)
-
-        return parsed_result
-    except json.JSONDecodeError:
+        # orjson parses the UTF-8 bytes directly, no intermediate str
+        return orjson.loads(result_bytes)
+    except orjson.JSONDecodeError:
         # Even if JSON parsing fails, we still need to free the string
         return None
     except Exception:
@@ -90,3 +82,26 @@ def classify_excel_sheets(xlsx_path):
         # Free the allocated string in Rust
         lib.free_c_string(result_ptr)
 
+
+
+def classify_excel_sheets_many(xlsx_paths, max_workers=None):
+    """
+    Classify the sheets of several Excel files in one batch
+
+    ctypes releases the GIL for the duration of the foreign call, so the
+    Rust classification of different files runs in parallel on a thread pool.
+
+    Args:
+        xlsx_paths (list[str | os.PathLike]): Paths to the Excel files
+        max_workers (int): Thread pool size, defaults to the executor's default
+
+    Returns:
+        list: One result per path, in order, as returned by classify_excel_sheets
+    """
+    if len(xlsx_paths) <= 1:
+        return [classify_excel_sheets(path) for path in xlsx_paths]
+
+    # Resolve the library before fanning out, so it is loaded exactly once
+    load_rust_library(_ROOT_PATH)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(classify_excel_sheets, xlsx_paths))
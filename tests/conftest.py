@@ -0,0 +1,20 @@
+"""
+pytest configuration, so the suite can run in parallel with pytest-xdist (`pytest -n auto`).
+The unittest runner ignores this file.
+"""
+import pytest
+
+# Test modules sharing on-disk state are kept on one worker (--dist loadgroup).
+# Everything else uses its own temporary or in-memory databases and directories.
+XDIST_GROUPS = {
+    # Both read and write the fixed processing directory
+    "test_plain_extractor.py": "processing_dir",
+    "test_spreadsheet_extractor.py": "processing_dir",
+}
+
+
+def pytest_collection_modifyitems(config, items):
+    for item in items:
+        group = XDIST_GROUPS.get(item.path.name)
+        if group is not None:
+            item.add_marker(pytest.mark.xdist_group(group))
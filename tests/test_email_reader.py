@@ -1,24 +1,17 @@
 import os
+import shutil
+from pathlib import Path
 import unittest
+from unittest.mock import patch
 
 from info_extract.config.profile_manager import ProfileManager
 from info_extract.source import EMLReader, MSGReader
+from info_extract.source.msg import _html_to_markdown
 
 class TestEmailReader(unittest.IsolatedAsyncioTestCase):
     def _clean_processing_dir(self):
-        for root, dirs, files in os.walk('./processing', topdown=False):
-            for file in files:
-                file_path = os.path.join(root, file)
-                try:
-                    os.remove(file_path)
-                except Exception:
-                    pass
-            for d in dirs:
-                dir_path = os.path.join(root, d)
-                try:
-                    os.rmdir(dir_path)
-                except Exception:
-                    pass
+        shutil.rmtree('./processing', ignore_errors=True)
+        os.makedirs('./processing', exist_ok=True)
 
     async def asyncSetUp(self) -> None:
         self._clean_processing_dir()
@@ -47,3 +40,27 @@ class TestEmailReader(unittest.IsolatedAsyncioTestCase):
                 if file.lower().endswith('.xlsx') or file.lower().endswith('.xls'):
                     excel_files.append(os.path.join(root, file))
         assert len(excel_files) > 0, "未能正确提取Excel文件"
+
+    def test_html_to_markdown_drops_style_and_script(self):
+        html_body = (
+            "<html><head><style>p { color: red; }</style></head>"
+            "<body><script>alert('x');</script><p>正文内容</p>"
+            "<img src=\"cid:logo\" alt=\"logo\"></body></html>"
+        )
+        body = _html_to_markdown(html_body.encode('utf-8'))
+        assert "正文内容" in body
+        assert "color: red" not in body, "样式内容不应出现在正文中"
+        assert "alert" not in body, "脚本内容不应出现在正文中"
+        assert "logo" not in body, "图片不应出现在正文中"
+
+    def test_msg_extract_body_without_body(self):
+        with patch.object(self.msg_reader, '_extract_body_with_msg_parser') as reparse:
+            body = self.msg_reader._extract_body(None, None, Path('empty.msg'))
+        assert body == "", "没有正文的邮件应得到空字符串"
+        reparse.assert_not_called()
+
+    def test_msg_extract_body_after_decode_error(self):
+        with patch.object(self.msg_reader, '_extract_body_with_msg_parser', return_value="正文") as reparse:
+            body = self.msg_reader._extract_body(None, None, Path('broken.msg'), decode_failed=True)
+        assert body == "正文"
+        reparse.assert_called_once_with(Path('broken.msg'))
@@ -2,25 +2,28 @@
 Tests for the Executor class and its components.
 """
 import asyncio
+import shutil
 import tempfile
 import os
 from unittest.mock import MagicMock, patch, AsyncMock
 import unittest
-from threading import Event
+from threading import Event, Timer
 
 from src.info_extract.executor import Executor
 from src.info_extract.config.profile_manager import ProfileManager
 
+# Keep the per-test work dirs on tmpfs when the host has one
+TMP_ROOT = "/dev/shm" if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK) else None
+
 
 class TestExecutor(unittest.IsolatedAsyncioTestCase):
     """Tests for Executor class."""
 
     def setUp(self):
-        self.work_dir = tempfile.mkdtemp()
+        self.work_dir = tempfile.mkdtemp(dir=TMP_ROOT)
         self.profile_manager = MagicMock(spec=ProfileManager)
 
     def tearDown(self):
-        import shutil
         shutil.rmtree(self.work_dir)
 
     def test_executor_initialization(self):
@@ -61,7 +64,7 @@ class TestExecutor(unittest.IsolatedAsyncioTestCase):
             self.assertEqual(len(result), 0)  # No steps to process
 
     async def test_executor_run_with_early_cancellation(self):
-        """Test Executor run method with early cancellation."""
+        """Test Executor run method with the cancellation event set before it starts."""
         executor = Executor(self.work_dir)
         
         # Create cancellation event
@@ -70,7 +73,6 @@ class TestExecutor(unittest.IsolatedAsyncioTestCase):
         
         # Mock the pipeline steps
         mock_source_step = MagicMock()
-        mock_source_step.run = AsyncMock()
         
         with patch.object(executor.pipeline, 'source', [('mock_source', mock_source_step)]), \
              patch.object(executor.pipeline, 'extractors', []), \
@@ -81,54 +83,146 @@ class TestExecutor(unittest.IsolatedAsyncioTestCase):
             async for progress in executor.run(self.profile_manager, cancellation_event=cancellation_event):
                 result.append(progress)
             
+            # Only the cancellation notice is yielded, no step is run
+            self.assertEqual(result, ["任务已取消: mock_source"])
+            mock_source_step.set_specific_files.assert_not_called()
+
+    async def test_executor_run_with_early_task_cancellation(self):
+        """Test Executor run method when its task is cancelled before it starts."""
+        executor = Executor(self.work_dir)
+        
+        # Mock the pipeline steps
+        mock_source_step = MagicMock()
+        mock_source_step.run = AsyncMock()
+        
+        with patch.object(executor.pipeline, 'source', [('mock_source', mock_source_step)]), \
+             patch.object(executor.pipeline, 'extractors', []), \
+             patch.object(executor.pipeline, 'destination', []):
+            
+            # Cancel the task before it gets to run
+            result = []
+            process_task = asyncio.create_task(self._collect_executor_results(executor, result))
+            process_task.cancel()
+            
+            with self.assertRaises(asyncio.CancelledError):
+                await process_task
+            
             # Should not process any steps
             self.assertEqual(len(result), 0)
             mock_source_step.run.assert_not_called()
 
+    async def test_executor_run_with_task_cancellation(self):
+        """Test that cancelling the running task interrupts the current step."""
+        executor = Executor(self.work_dir)
+        
+        async def mock_source_run(profile_manager):
+            for i in range(5):
+                await asyncio.sleep(0.1)
+                yield (f"file{i}.eml", {})
+        
+        mock_source_step = MagicMock()
+        mock_source_step.set_specific_files.return_value.run = mock_source_run
+        
+        with patch.object(executor.pipeline, 'source', [('mock_source', mock_source_step)]), \
+             patch.object(executor.pipeline, 'extractors', []), \
+             patch.object(executor.pipeline, 'destination', []):
+            
+            result = []
+            process_task = asyncio.create_task(self._collect_executor_results(executor, result))
+            await asyncio.sleep(0.25)
+            process_task.cancel()
+            
+            # CancelledError propagates out of Executor.run
+            with self.assertRaises(asyncio.CancelledError):
+                await process_task
+            
+            self.assertGreater(len(result), 0)
+            self.assertLess(len(result), 5)
+
     async def test_executor_run_with_mid_process_cancellation(self):
         """Test Executor run method with cancellation during processing."""
         executor = Executor(self.work_dir)
         
         # Create cancellation event
         cancellation_event = Event()
+        # The source only produces an item once the test opens the gate
+        gate = asyncio.Event()
         
         # Mock a source step that yields multiple results
         async def mock_source_run(profile_manager):
             for i in range(5):
-                # Simulate processing delay
-                await asyncio.sleep(0.1)
+                await gate.wait()
+                gate.clear()
                 # Check if cancellation event is set
                 if cancellation_event.is_set():
                     return
                 yield (f"file{i}.eml", {})
         
         mock_source_step = MagicMock()
-        mock_source_step.run = mock_source_run
+        mock_source_step.set_specific_files.return_value.run = mock_source_run
+        # The Executor itself must stop before the next step
+        mock_next_step = MagicMock()
+        
+        with patch.object(executor.pipeline, 'source', [('mock_source', mock_source_step)]), \
+             patch.object(executor.pipeline, 'extractors', [('mock_extractor', mock_next_step)]), \
+             patch.object(executor.pipeline, 'destination', []):
+            
+            progress = executor.run(self.profile_manager, cancellation_event=cancellation_event)
+            result = []
+            # Let exactly two files through
+            for _ in range(2):
+                gate.set()
+                result.append(await anext(progress))
+            
+            # Cancel, then release the source so it observes the event
+            cancellation_event.set()
+            gate.set()
+            remaining = [item async for item in progress]
+            
+            self.assertEqual(result, ["读取file0.eml", "读取file1.eml"])
+            self.assertEqual(remaining, ["任务已取消: mock_extractor"])
+            mock_next_step.run.assert_not_called()
+
+    async def test_executor_run_with_threading_event_set_mid_step(self):
+        """Test that a threading.Event set from another thread interrupts the current step."""
+        executor = Executor(self.work_dir)
+        cancellation_event = Event()
+        step_closed = asyncio.Event()
+        
+        # A source step that would never finish on its own
+        async def mock_source_run(profile_manager):
+            try:
+                yield ("file0.eml", {})
+                await asyncio.sleep(60)
+                yield ("file1.eml", {})
+            finally:
+                step_closed.set()
+        
+        mock_source_step = MagicMock()
+        mock_source_step.set_specific_files.return_value.run = mock_source_run
         
         with patch.object(executor.pipeline, 'source', [('mock_source', mock_source_step)]), \
              patch.object(executor.pipeline, 'extractors', []), \
              patch.object(executor.pipeline, 'destination', []):
             
-            # Run with cancellation event
             result = []
-            # Start processing and cancel after 0.2 seconds
-            async def cancel_after_delay():
-                await asyncio.sleep(0.2)
-                cancellation_event.set()
+            process_task = asyncio.create_task(
+                self._collect_executor_results(executor, result, cancellation_event))
+            while not result:
+                await asyncio.sleep(0)
             
-            # Run both coroutines concurrently
-            cancel_task = asyncio.create_task(cancel_after_delay())
-            process_task = asyncio.create_task(self._collect_executor_results(executor, result))
+            # A sync caller sets the event from its own thread while the step is waiting
+            Timer(0.05, cancellation_event.set).start()
             
-            await asyncio.gather(cancel_task, process_task)
+            with self.assertRaises(asyncio.CancelledError):
+                await asyncio.wait_for(process_task, timeout=5)
             
-            # Should have processed some steps but not all
-            self.assertGreater(len(result), 0)
-            self.assertLess(len(result), 5)  # Should be cancelled before processing all 5 files
+            self.assertEqual(result, ["读取file0.eml"])
+            self.assertTrue(step_closed.is_set())
 
-    async def _collect_executor_results(self, executor, result_list):
+    async def _collect_executor_results(self, executor, result_list, cancellation_event=None):
         """Helper method to collect executor results into a list."""
-        async for progress in executor.run(self.profile_manager, cancellation_event=Event()):
+        async for progress in executor.run(self.profile_manager, cancellation_event=cancellation_event or Event()):
             result_list.append(progress)
 
     def test_clean_processing_dir(self):
@@ -145,17 +239,12 @@ class TestExecutor(unittest.IsolatedAsyncioTestCase):
         with open(test_file2, 'w') as f:
             f.write('test content')
         
-        # Verify files exist before cleaning
-        self.assertTrue(os.path.exists(test_file1))
-        self.assertTrue(os.path.exists(test_file2))
-        
         # Clean processing directory
         executor.clean_processing_dir()
         
-        # Verify files and directories are removed
-        self.assertFalse(os.path.exists(test_file1))
-        self.assertFalse(os.path.exists(test_file2))
-        self.assertFalse(os.path.exists(os.path.dirname(test_file2)))
+        # The directory is kept (scandir would raise otherwise) but left empty
+        with os.scandir(executor.processing_dir) as it:
+            self.assertEqual(list(it), [])
 
 
 if __name__ == '__main__':
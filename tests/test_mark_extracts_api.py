@@ -1,157 +1,198 @@
 """
 Test module for the mark_extracts API endpoints.
 """
+import sqlite3
 import tempfile
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from unittest.mock import patch
+
+import pytest
 from fastapi.testclient import TestClient
 
 # Add the src directory to the path so we can import the modules
 import sys
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from src.info_extract.ui import UI
 from src.info_extract.config.profile_manager import ProfileManager
+from src.info_extract.ui import UI
 
 
 def setup_test_database():
     """Create a temporary database for testing."""
     # Create temporary database file
-    temp_db_fd, temp_db_path = tempfile.mkstemp(suffix='.db')
+    with tempfile.NamedTemporaryFile(suffix='.db', delete=False) as temp_db:
+        temp_db_path = temp_db.name
     
-    # Copy the standard.db to the temp location
+    # Copy the standard.db to the temp location. The backup API goes through
+    # SQLite, so pages still sitting in the WAL file are copied as well.
     standard_db_path = Path(__file__).parent.parent / "config" / "standard.db"
     if standard_db_path.exists():
-        with open(standard_db_path, 'rb') as src:
-            with open(temp_db_path, 'wb') as dst:
-                dst.write(src.read())
+        src = sqlite3.connect(f"{standard_db_path.resolve().as_uri()}?mode=ro", uri=True)
+        dst = sqlite3.connect(temp_db_path)
+        try:
+            # Test-only: the copy is throwaway, so skip fsync and the on-disk journal
+            dst.executescript("PRAGMA journal_mode=MEMORY; PRAGMA synchronous=OFF;")
+            src.backup(dst)
+        finally:
+            src.close()
+            dst.close()
     
-    os.close(temp_db_fd)  # Close the file descriptor
     return temp_db_path
 
 
-def test_mark_extracts_api():
-    """Test the mark_extracts API endpoints."""
-    # Set up temporary database for testing
-    temp_db_path = setup_test_database()
-    
-    try:
-        # Initialize profile manager with test database
-        profile_manager = ProfileManager(db_path=str(temp_db_path))
-        
-        # Create UI instance
-        ui = UI(db_path=str(temp_db_path))
-        client = TestClient(ui.app)
-        
-        # Test getting available info items
-        response = client.get("/config/info_item")
-        assert response.status_code == 200
-        info_items = response.json()
-        assert isinstance(info_items, list)
-        
-        # Test creating an example text
-        response = client.post("/config/example", params={"fragment": "This is a test example text."})
-        assert response.status_code == 200
-        example_data = response.json()
-        assert "id" in example_data
-        assert example_data["fragment"] == "This is a test example text."
-        
-        example_id = example_data["id"]
-        
-        # Test getting all example texts
-        response = client.get("/config/example_texts")
-        assert response.status_code == 200
-        examples = response.json()
-        assert isinstance(examples, list)
-        assert len(examples) >= 1
-        
-        # If we have at least one info item, test creating an extraction
-        if info_items:
-            info_item_id = info_items[0]["id"]
-            
-            # Test creating an extraction record
-            response = client.post("/config/extractions", 
-                                 params={
-                                     "example_id": example_id,
-                                     "extraction_info_item_id": info_item_id,
-                                     "extraction_text": "test extraction"
-                                 })
-            assert response.status_code == 200
-            extraction_data = response.json()
-            assert "id" in extraction_data
-            assert extraction_data["extraction_text"] == "test extraction"
-            
-            extraction_id = extraction_data["id"]
-            
-            # Test getting extractions by example ID
-            response = client.get(f"/config/example/{example_id}/extractions")
-            assert response.status_code == 200
-            extractions = response.json()
-            assert isinstance(extractions, list)
-            assert len(extractions) >= 1
-            
-            # Test creating an extraction attribute
-            response = client.post(f"/config/extractions/{extraction_id}/attributes",
-                                 params={
-                                     "key": "test_key",
-                                     "value": "test_value"
-                                 })
-            assert response.status_code == 200
-            attribute_data = response.json()
-            assert "id" in attribute_data
-            assert attribute_data["key"] == "test_key"
-            assert attribute_data["value"] == "test_value"
-            
-            attribute_id = attribute_data["id"]
-            
-            # Test getting attributes for an extraction
-            response = client.get(f"/config/extractions/{extraction_id}/attributes")
-            assert response.status_code == 200
-            attributes = response.json()
-            assert isinstance(attributes, list)
-            assert len(attributes) >= 1
-            
-            # Test updating the example text
-            response = client.put(f"/config/example/{example_id}",
-                                params={"fragment": "Updated example text."})
-            assert response.status_code == 200
-            updated_example = response.json()
-            assert updated_example["fragment"] == "Updated example text."
-            
-            # Test updating the extraction
-            response = client.put(f"/config/extractions/{extraction_id}",
-                                params={"extraction_text": "Updated extraction text"})
-            assert response.status_code == 200
-            updated_extraction = response.json()
-            assert updated_extraction["extraction_text"] == "Updated extraction text"
-            
-            # Test updating the attribute
-            response = client.put(f"/config/extractions/attributes/{attribute_id}",
-                                params={"key": "updated_key", "value": "updated_value"})
-            assert response.status_code == 200
-            updated_attribute = response.json()
-            assert updated_attribute["key"] == "updated_key"
-            assert updated_attribute["value"] == "updated_value"
-            
-            # Test deleting the attribute
-            response = client.delete(f"/config/extractions/attributes/{attribute_id}")
-            assert response.status_code == 200
-            
-            # Test deleting the extraction
-            response = client.delete(f"/config/extractions/{extraction_id}")
-            assert response.status_code == 200
-            
-            # Test deleting the example text
-            response = client.delete(f"/config/example/{example_id}")
-            assert response.status_code == 200
-            
-        print("All API endpoints working correctly!")
-        
-    finally:
-        # Clean up temporary database
-        if os.path.exists(temp_db_path):
-            os.remove(temp_db_path)
+def get_concurrently(client, *urls):
+    """Issue independent read-only GETs at once; writes stay sequential."""
+    with ThreadPoolExecutor(max_workers=len(urls)) as pool:
+        return list(pool.map(client.get, urls))
+
+
+@pytest.fixture(scope="module")
+def temp_db_path():
+    """One temporary copy of standard.db shared by the whole module."""
+    path = setup_test_database()
+    yield path
+    # Clean up temporary database, and the WAL files ConfigDB leaves next to it
+    for leftover in (path, f"{path}-wal", f"{path}-shm"):
+        if os.path.exists(leftover):
+            os.remove(leftover)
+
+
+@pytest.fixture(scope="module")
+def client(temp_db_path):
+    """One UI app and TestClient for the module, so app startup/shutdown run once."""
+    ui = UI(db_path=str(temp_db_path))
+    # UI ignores db_path and its lifespan yields config.profile_manager, so point that at the copy
+    test_profile_manager = ProfileManager(str(temp_db_path))
+    # Entering the client runs the app lifespan, which would open a browser tab
+    with patch("src.info_extract.config.profile_manager", test_profile_manager), \
+         patch("src.info_extract.ui.webbrowser.open_new_tab"), TestClient(ui.app) as client:
+        yield client
+    test_profile_manager.get_config_db().close()
+
+
+@pytest.fixture
+def example_id(client):
+    """Create an example text for a test and delete it afterwards."""
+    response = client.post("/config/example", data={"fragment": "This is a test example text."})
+    assert response.status_code == 200
+    example_id = response.json()["id"]
+    yield example_id
+    client.delete(f"/config/example/{example_id}")
+
+
+def test_get_info_items(client):
+    """Test getting available info items."""
+    response = client.get("/config/info_item")
+    assert response.status_code == 200
+    assert isinstance(response.json(), list)
+
+
+def test_example_text_crud(client):
+    """Test creating, listing, updating and deleting an example text."""
+    # Test creating an example text
+    response = client.post("/config/example", data={"fragment": "This is a test example text."})
+    assert response.status_code == 200
+    example_data = response.json()
+    assert "id" in example_data
+    assert example_data["fragment"] == "This is a test example text."
+    
+    example_id = example_data["id"]
+    
+    # Test getting all example texts
+    response = client.get("/config/example_texts")
+    assert response.status_code == 200
+    examples = response.json()
+    assert isinstance(examples, list)
+    assert len(examples) >= 1
+    
+    # Test updating the example text
+    response = client.put(f"/config/example/{example_id}",
+                        data={"fragment": "Updated example text."})
+    assert response.status_code == 200
+    updated_example = response.json()
+    assert updated_example["fragment"] == "Updated example text."
+    
+    # Test deleting the example text
+    response = client.delete(f"/config/example/{example_id}")
+    assert response.status_code == 200
+
+
+def test_extraction_and_attribute_crud(client, example_id):
+    """Test the extraction and extraction attribute endpoints."""
+    info_items = client.get("/config/info_item").json()
+    if not info_items:
+        pytest.skip("no info items in standard.db")
+    info_item_id = info_items[0]["id"]
+    
+    # Test creating an extraction record
+    response = client.post("/config/extractions", 
+                         data={
+                             "example_id": example_id,
+                             "extraction_info_item_id": info_item_id,
+                             "extraction_text": "test extraction"
+                         })
+    assert response.status_code == 200
+    extraction_data = response.json()
+    assert "id" in extraction_data
+    assert extraction_data["extraction_text"] == "test extraction"
+    
+    extraction_id = extraction_data["id"]
+    
+    # Test creating an extraction attribute
+    response = client.post(f"/config/extractions/{extraction_id}/attributes",
+                         data={
+                             "key": "test_key",
+                             "value": "test_value"
+                         })
+    assert response.status_code == 200
+    attribute_data = response.json()
+    assert "id" in attribute_data
+    assert attribute_data["key"] == "test_key"
+    assert attribute_data["value"] == "test_value"
+    
+    attribute_id = attribute_data["id"]
+    
+    # Test getting extractions by example ID and attributes for an extraction
+    extractions_response, attributes_response = get_concurrently(
+        client,
+        f"/config/example/{example_id}/extractions",
+        f"/config/extractions/{extraction_id}/attributes",
+    )
+    assert extractions_response.status_code == 200
+    extractions = extractions_response.json()
+    assert isinstance(extractions, list)
+    assert len(extractions) >= 1
+    
+    assert attributes_response.status_code == 200
+    attributes = attributes_response.json()
+    assert isinstance(attributes, list)
+    assert len(attributes) >= 1
+    
+    # Test updating the extraction
+    response = client.put(f"/config/extractions/{extraction_id}",
+                        data={"extraction_text": "Updated extraction text"})
+    assert response.status_code == 200
+    updated_extraction = response.json()
+    assert updated_extraction["extraction_text"] == "Updated extraction text"
+    
+    # Test updating the attribute
+    response = client.put(f"/config/extractions/attributes/{attribute_id}",
+                        data={"key": "updated_key", "value": "updated_value"})
+    assert response.status_code == 200
+    updated_attribute = response.json()
+    assert updated_attribute["key"] == "updated_key"
+    assert updated_attribute["value"] == "updated_value"
+    
+    # Test deleting the attribute
+    response = client.delete(f"/config/extractions/attributes/{attribute_id}")
+    assert response.status_code == 200
+    
+    # Test deleting the extraction
+    response = client.delete(f"/config/extractions/{extraction_id}")
+    assert response.status_code == 200
 
 
 if __name__ == "__main__":
-    test_mark_extracts_api()
\ No newline at end of file
+    sys.exit(pytest.main([__file__]))
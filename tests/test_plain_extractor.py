@@ -1,17 +1,21 @@
 import textwrap
 import unittest
+from unittest.mock import patch
 
 import langextract as lx
 from info_extract.extract.tokenizer import tokenize
 import absl.logging as logging
 from info_extract.extract.plain_extract import PlainExtractor
-
-lx.core.tokenizer.tokenize = tokenize
+from info_extract.config.profile_manager import profile_manager
 
 logging.get_absl_logger().setLevel(logging.INFO)
 
-class TestPlainExtractor(unittest.TestCase):
+class TestPlainExtractor(unittest.IsolatedAsyncioTestCase):
     def setUp(self) -> None:
+        # Scope the tokenizer override to each test instead of patching langextract for the whole session
+        tok_patch = patch('langextract.core.tokenizer.tokenize', tokenize)
+        tok_patch.start()
+        self.addCleanup(tok_patch.stop)
         self.extractor = PlainExtractor(r"/data/home/macx/work/tmp/processing")
         self.content = textwrap.dedent(r"""
                     Hi Kris,
@@ -33,23 +37,22 @@ class TestPlainExtractor(unittest.TestCase):
         return super().setUp()
 
     # @unittest.skip("skip test_extract_one")
-    def test_extract_one(self):
+    async def test_extract_one(self):
         doc = lx.data.Document(self.content,
                                 document_id="test")
-        result = self.extractor.fetch_all([doc])
-        for extract_result in result:
+        # fetch_all 是异步生成器，每个文档完成即产出结果
+        async for extract_result in self.extractor.fetch_all([doc], profile_manager):
             assert extract_result is not None, "extract_result must not be None"
             assert extract_result.data is not None, "data must not be None"
             print(extract_result.data)
     
     @unittest.skip("lang data")
-    def test_extract_01(self):
+    async def test_extract_01(self):
         source = "./tests/DNCP.txt"
         with open(source, 'r', encoding='utf-8') as f:
             content = f.read()
             doc = lx.data.Document(content,
                                    document_id="test")
-            result = self.extractor.fetch_all([doc], debug=False)
-            for extract_result in result:
+            async for extract_result in self.extractor.fetch_all([doc], profile_manager, debug=False):
                 assert extract_result is not None, "extract_result must not be None"
        
@@ -1,133 +1,138 @@
 """
 Unit tests for the profile-based configuration system.
 """
-import os
-import tempfile
 import unittest
 import sqlite3
+import uuid
 from pathlib import Path
 
 from src.info_extract.config.config_db import ConfigDB
 from src.info_extract.config.profile_manager import ProfileManager
 from src.info_extract.config.config_models import InfoItem
-from src.info_extract.config.config_utils import initialize_profile_manager, output_info_items
+
+
+# Test-only: the databases are throwaway, so skip fsync and the on-disk journal
+TEST_DB_PRAGMAS = """
+    PRAGMA journal_mode=MEMORY;
+    PRAGMA synchronous=OFF;
+    PRAGMA temp_store=MEMORY;
+"""
+
+
+# Schema (mimicking the migration) and sample data for the default profile
+TEST_DB_SCHEMA = """
+    CREATE TABLE profile (
+        id INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL UNIQUE,
+        description TEXT,
+        is_default BOOLEAN DEFAULT 0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+
+    CREATE TABLE info_item (
+        id INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT,
+        label TEXT NOT NULL,
+        describe TEXT,
+        data_type TEXT,
+        sort_no INTEGER,
+        sample_col_name TEXT,
+        profile_id INTEGER NOT NULL DEFAULT 1
+    );
+
+    CREATE TABLE example (
+        id INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT,
+        fragment TEXT,
+        profile_id INTEGER NOT NULL DEFAULT 1
+    );
+
+    CREATE TABLE extraction (
+        id INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT,
+        example_id INTEGER,
+        extraction_info_item_id INTEGER,
+        extraction_text TEXT,
+        profile_id INTEGER NOT NULL DEFAULT 1
+    );
+
+    CREATE TABLE ext_attribute (
+        id INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT,
+        extraction_id INTEGER,
+        "key" TEXT NOT NULL,
+        value TEXT NOT NULL,
+        profile_id INTEGER NOT NULL DEFAULT 1
+    );
+
+    CREATE TABLE mapping_cache (
+        id INTEGER NOT NULL,
+        hash_key TEXT(32) NOT NULL,
+        sql_code TEXT,
+        CONSTRAINT mapping_cache_pk PRIMARY KEY (id)
+    );
+
+    CREATE INDEX idx_info_item_profile ON info_item(profile_id);
+    CREATE INDEX idx_example_profile ON example(profile_id);
+    CREATE INDEX idx_extraction_profile ON extraction(profile_id);
+    CREATE INDEX idx_ext_attribute_profile ON ext_attribute(profile_id);
+
+    BEGIN;
+    INSERT INTO profile (id, name, description, is_default) VALUES (1, 'Default', 'Default profile', 1);
+    INSERT INTO info_item (label, describe, data_type, sort_no, sample_col_name, profile_id)
+    VALUES ('Test Field', 'A test field', 'string', 1, 'test_field', 1);
+    INSERT INTO example (fragment, profile_id)
+    VALUES ('This is a test example', 1);
+    COMMIT;
+"""
 
 
 class TestProfileFunctionality(unittest.TestCase):
     """Test cases for profile-based configuration functionality."""
     
+    @classmethod
+    def setUpClass(cls):
+        """Build the schema and sample data once, in an in-memory template database."""
+        conn = sqlite3.connect(":memory:")
+        conn.executescript(TEST_DB_SCHEMA)
+        cls._template = conn
+
+        # One named in-memory database and ProfileManager for the class; setUp restores both.
+        # The holder connection keeps the shared database alive between ConfigDB connections.
+        cls.db_uri = f"file:test_profile_{uuid.uuid4().hex}?mode=memory&cache=shared"
+        cls._holder = sqlite3.connect(cls.db_uri, uri=True)
+        cls._holder.executescript(TEST_DB_PRAGMAS)
+        cls._restore_database()
+        cls.profile_manager = ProfileManager(cls.db_uri)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.profile_manager.get_config_db().close()
+        cls._holder.close()
+        cls._template.close()
+
+    @classmethod
+    def _restore_database(cls):
+        # Copy the prebuilt template pages instead of re-running the DDL per test
+        cls._template.backup(cls._holder)
+
     def setUp(self):
-        """Set up test database with sample data."""
-        # Create a temporary database file
-        self.temp_db_fd, self.temp_db_path = tempfile.mkstemp(suffix='.db')
-        
-        # Create the database with the updated schema
-        conn = sqlite3.connect(self.temp_db_path)
-        
-        # Create tables (mimicking the migration)
-        conn.execute("""
-            CREATE TABLE profile (
-                id INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL UNIQUE,
-                description TEXT,
-                is_default BOOLEAN DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            );
-        """)
-        
-        conn.execute("""
-            CREATE TABLE info_item (
-                id INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT,
-                label TEXT NOT NULL,
-                describe TEXT,
-                data_type TEXT,
-                sort_no INTEGER,
-                sample_col_name TEXT,
-                profile_id INTEGER NOT NULL DEFAULT 1
-            );
-        """)
-        
-        conn.execute("""
-            CREATE TABLE example (
-                id INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT,
-                fragment TEXT,
-                profile_id INTEGER NOT NULL DEFAULT 1
-            );
-        """)
-        
-        conn.execute("""
-            CREATE TABLE extraction (
-                id INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT,
-                example_id INTEGER,
-                extraction_info_item_id INTEGER,
-                extraction_text TEXT,
-                profile_id INTEGER NOT NULL DEFAULT 1
-            );
-        """)
-        
-        conn.execute("""
-            CREATE TABLE ext_attribute (
-                id INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT,
-                extraction_id INTEGER,
-                "key" TEXT NOT NULL,
-                value TEXT NOT NULL,
-                profile_id INTEGER NOT NULL DEFAULT 1
-            );
-        """)
-        
-        conn.execute("""
-            CREATE TABLE mapping_cache (
-                id INTEGER NOT NULL,
-                hash_key TEXT(32) NOT NULL,
-                sql_code TEXT,
-                CONSTRAINT mapping_cache_pk PRIMARY KEY (id)
-            );
-        """)
-        
-        # Create indexes
-        conn.execute("CREATE INDEX idx_info_item_profile ON info_item(profile_id);")
-        conn.execute("CREATE INDEX idx_example_profile ON example(profile_id);")
-        conn.execute("CREATE INDEX idx_extraction_profile ON extraction(profile_id);")
-        conn.execute("CREATE INDEX idx_ext_attribute_profile ON ext_attribute(profile_id);")
-        
-        # Insert default profile
-        conn.execute("INSERT INTO profile (id, name, description, is_default) VALUES (1, 'Default', 'Default profile', 1);")
-        
-        # Insert sample data for default profile
-        conn.execute("""
-            INSERT INTO info_item (label, describe, data_type, sort_no, sample_col_name, profile_id)
-            VALUES ('Test Field', 'A test field', 'string', 1, 'test_field', 1);
-        """)
-        
-        conn.execute("""
-            INSERT INTO example (fragment, profile_id) 
-            VALUES ('This is a test example', 1);
-        """)
-        
-        conn.commit()
-        conn.close()
-    
-    def tearDown(self):
-        """Clean up test database."""
-        os.close(self.temp_db_fd)
-        os.unlink(self.temp_db_path)
+        """Reset the test database to the sample data."""
+        self._restore_database()
+        self.profile_manager.reset_state()
     
     def test_config_db_profile_filtering(self):
         """Test that ConfigDB filters data by profile."""
         # Test with default profile (ID 1) - should return data
-        config_db = ConfigDB(self.temp_db_path, active_profile_id=1)
+        config_db = ConfigDB(self.db_uri, active_profile_id=1)
         info_items = config_db.get_info_items()
         self.assertEqual(len(info_items), 1)
         self.assertEqual(info_items[0].label, 'Test Field')
         
         # Test with non-existent profile (ID 2) - should return empty list
-        config_db_other = ConfigDB(self.temp_db_path, active_profile_id=2)
+        config_db_other = ConfigDB(self.db_uri, active_profile_id=2)
         info_items_other = config_db_other.get_info_items()
         self.assertEqual(len(info_items_other), 0)
     
     def test_profile_manager_creation(self):
         """Test ProfileManager creation and basic functionality."""
-        profile_manager = ProfileManager(self.temp_db_path)
+        profile_manager = self.profile_manager
         
         # Check current profile is default
         current_profile = profile_manager.get_current_profile()
@@ -144,7 +149,7 @@ class TestProfileFunctionality(unittest.TestCase):
     
     def test_profile_switching(self):
         """Test profile creation and switching."""
-        profile_manager = ProfileManager(self.temp_db_path)
+        profile_manager = self.profile_manager
         
         # Create a new profile
         new_profile_id = profile_manager.create_profile("Test Profile", "A test profile")
@@ -166,19 +171,16 @@ class TestProfileFunctionality(unittest.TestCase):
         else:
             self.fail("get_current_profile is None")
     
-    def test_config_utils_backward_compatibility(self):
-        """Test that config_utils functions work with default profile."""
-        # Initialize with test database
-        initialize_profile_manager(self.temp_db_path, 1)
-        
-        # Test that output_info_items works (should return default profile data)
-        items = output_info_items()
+    def test_output_info_items_default_profile(self):
+        """Test that output_info_items returns the default profile's columns."""
+        # A fresh ProfileManager on the test database starts on the default profile
+        items = ProfileManager(self.db_uri, 1).output_info_items()
         self.assertEqual(len(items), 1)
         self.assertEqual(items[0]['name'], 'Test Field')
     
     def test_config_db_profile_isolation(self):
         """Test that profiles are isolated from each other."""
-        profile_manager = ProfileManager(self.temp_db_path)
+        profile_manager = self.profile_manager
         
         # Add an item to the default profile
         default_config_db = profile_manager.get_config_db()
@@ -188,7 +190,8 @@ class TestProfileFunctionality(unittest.TestCase):
             describe='Field in default profile',
             data_type='string',
             sort_no=2,
-            sample_col_name='default_field'
+            sample_col_name='default_field',
+            profile_id=1
         )
         item_id = default_config_db.add_item(new_item)
         self.assertGreater(item_id, 0)
@@ -205,4 +208,37 @@ class TestProfileFunctionality(unittest.TestCase):
         # Switch back to default and verify original items still exist
         profile_manager.switch_profile(1)
         default_profile_items = profile_manager.get_config_db().get_info_items()
-        self.assertEqual(len(default_profile_items), 2)  # Original + newly added item
\ No newline at end of file
+        self.assertEqual(len(default_profile_items), 2)  # Original + newly added item
+
+    def test_config_db_add_items(self):
+        """Test inserting several info items in one call."""
+        config_db = self.profile_manager.get_config_db()
+        new_items = [
+            InfoItem(id=0, label=f'Batch Field {i}', describe=None, data_type='string',
+                     sort_no=10 + i, sample_col_name='', profile_id=1)
+            for i in range(3)
+        ]
+        item_ids = config_db.add_items(new_items)
+        self.assertEqual(len(item_ids), 3)
+        self.assertEqual(item_ids, sorted(item_ids))
+
+        labels = {item.id: item.label for item in config_db.get_info_items()}
+        self.assertEqual([labels[i] for i in item_ids], ['Batch Field 0', 'Batch Field 1', 'Batch Field 2'])
+
+    def test_cached_prompt_sees_writes_from_other_config_db(self):
+        """Test that a write through another ConfigDB on the same database refreshes the cache."""
+        prompt = self.profile_manager.generate_info_item_define_prompt()
+        self.assertNotIn('Other Field', prompt)
+
+        other_config_db = ConfigDB(self.db_uri, active_profile_id=1)
+        other_config_db.add_item(InfoItem(id=0, label='Other Field', describe=None, data_type='string',
+                                          sort_no=2, sample_col_name='', profile_id=1))
+        other_config_db.close()
+
+        self.assertIn('Other Field', self.profile_manager.generate_info_item_define_prompt())
+
+    def test_cached_examples_are_copies(self):
+        """Test that changing the returned examples does not change the cached ones."""
+        examples = self.profile_manager.get_examples()
+        examples.clear()
+        self.assertEqual(len(self.profile_manager.get_examples()), 1)
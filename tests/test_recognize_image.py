@@ -1,6 +1,13 @@
 from pathlib import Path
 import unittest
 from info_extract.utils import recognize_image
+from info_extract.utils.image2json import VisionAgentConfig, _get_agent
+
+
+def setUpModule():
+    # 预先构建默认Agent（lru_cache缓存），各用例共享同一个Agent及其HTTP连接
+    _get_agent(None, VisionAgentConfig().model)
+
 
 class TestRecognizeImage(unittest.IsolatedAsyncioTestCase):
 
@@ -8,4 +15,4 @@ class TestRecognizeImage(unittest.IsolatedAsyncioTestCase):
         image_path = Path(__file__).parent / 'files' / 'test1.png'
         result = await recognize_image(str(image_path))
         self.assertIsNotNone(result)
-        print(result.to_pandas().iloc[0]) # 打印识别结果 # pyright: ignore
\ No newline at end of file
+        print(result.to_pandas().iloc[0]) # 打印识别结果 # pyright: ignore
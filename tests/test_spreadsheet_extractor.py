@@ -1,16 +1,25 @@
-from pathlib import Path
+import os
 import unittest
 
 from info_extract.extract import SpreadsheetExtractor
+from info_extract.config.profile_manager import profile_manager
+
+PROCESSING_DIR = r"/data/home/macx/work/tmp/processing"
 
 class TestSpreadsheetExtractor(unittest.IsolatedAsyncioTestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        # The parquet set does not change during the run; list it once per class
+        with os.scandir(PROCESSING_DIR) as it:
+            cls._parquet_files = tuple(
+                e.path for e in it
+                if e.name.endswith(".parquet") and e.is_file(follow_symlinks=False)
+            )
+
     async def asyncSetUp(self) -> None:
-        processing_dir = r"/data/home/macx/work/tmp/processing"
-        self.extractor = SpreadsheetExtractor(processing_dir)
-        self.extractor.pre_results = [
-           (str(f), []) for f in Path(processing_dir).glob("*.parquet")
-        ]
+        self.extractor = SpreadsheetExtractor(PROCESSING_DIR)
+        self.extractor.pre_results = [(f, []) for f in self._parquet_files]
     
     async def test_run(self):
-        async for extract_result in self.extractor.run():
-            print(extract_result[0])
\ No newline at end of file
+        async for extract_result in self.extractor.run(profile_manager):
+            print(extract_result[0])
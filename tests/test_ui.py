@@ -2,27 +2,146 @@
 Tests for the UI module and its components.
 """
 import asyncio
+import sqlite3
 import tempfile
 import os
 import json
+import sys
 from pathlib import Path
-from unittest.mock import MagicMock, patch, AsyncMock
+from typing import Any
+from unittest.mock import MagicMock, patch
 import unittest
 from fastapi.testclient import TestClient
 from fastapi import HTTPException
 
-from src.info_extract.config import profile_manager
+from src.info_extract.config.profile_manager import ProfileManager
 from src.info_extract.ui import UI
+from src.info_extract.route.task import running_executors
 from src.info_extract.config.config_db import ConfigDB
 from src.info_extract.config.config_models import InfoItem
 
 
-class TestUIInitialization(unittest.TestCase):
+# Heavy dependencies are replaced once for the whole module instead of per test:
+# uvicorn is never started, and the task routes get a pipeline that does no work.
+async def _no_progress(profile_manager):
+    """Stands in for Executor.run: an async generator that finishes without output."""
+    return
+    yield
+
+
+MockExecutor = MagicMock(name="Executor")
+MockExecutor.return_value.run = MagicMock(side_effect=_no_progress)
+
+_module_patches = [
+    patch.dict(sys.modules, {"uvicorn": MagicMock(name="uvicorn")}),
+    patch("src.info_extract.route.task.Executor", MockExecutor),
+    # Entering the shared client runs the app lifespan, which would open a browser tab
+    patch("src.info_extract.ui.webbrowser.open_new_tab"),
+    # Only the HTTP plumbing of the progress stream is tested, not its pacing
+    patch("src.info_extract.route.task.STATUS_FRAME_DELAY", 0),
+    patch("src.info_extract.route.task.PROGRESS_FRAME_DELAY", 0),
+]
+
+STANDARD_DB_PATH = Path(__file__).parent.parent / "config" / "standard.db"
+
+# One UI app and TestClient serve every route test class; see SharedClientTestCase
+_shared_tmp: tempfile.TemporaryDirectory
+_shared_ui: UI
+_shared_client: TestClient
+# The app's profile manager, on a throwaway copy of standard.db; the tests truncate its info items
+_db_tmp: tempfile.TemporaryDirectory
+_db_patch: Any
+profile_manager: ProfileManager
+
+
+def copy_standard_db(target: Path):
+    """Copy the shipped standard.db through the backup API, opening the original read-only."""
+    src = sqlite3.connect(f"{STANDARD_DB_PATH.resolve().as_uri()}?mode=ro", uri=True)
+    dst = sqlite3.connect(target)
+    try:
+        src.backup(dst)
+    finally:
+        src.close()
+        dst.close()
+
+
+def setUpModule():
+    global _shared_tmp, _shared_ui, _shared_client, _db_tmp, _db_patch, profile_manager
+    _db_tmp = tempfile.TemporaryDirectory()
+    db_path = Path(_db_tmp.name) / "standard.db"
+    copy_standard_db(db_path)
+    profile_manager = ProfileManager(str(db_path))
+
+    # UI ignores db_path, its lifespan always yields config.profile_manager; swap in the copy
+    _db_patch = patch("src.info_extract.config.profile_manager", profile_manager)
+    _db_patch.start()
+    for module_patch in _module_patches:
+        module_patch.start()
+
+    _shared_tmp = tempfile.TemporaryDirectory()
+    # CORS is only checked by TestUICORSConfiguration, which builds its own app
+    _shared_ui = UI(db_path=":memory:", work_dir=_shared_tmp.name, cors_enabled=False)
+    _shared_client = TestClient(_shared_ui.app)
+    _shared_client.__enter__()
+
+
+def tearDownModule():
+    _shared_client.__exit__(None, None, None)
+    _shared_tmp.cleanup()
+    for module_patch in reversed(_module_patches):
+        module_patch.stop()
+    _db_patch.stop()
+    profile_manager.get_config_db().close()
+    _db_tmp.cleanup()
+
+
+def write_fixture(path, data: bytes):
+    """Write a throwaway fixture file with raw os calls, no text codec or buffered IO."""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    try:
+        os.write(fd, data)
+    finally:
+        os.close(fd)
+
+
+class SharedWorkDirTestCase(unittest.TestCase):
+    """Base class giving every test class one temporary work dir, removed in tearDownClass."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls._tmp = tempfile.TemporaryDirectory()
+        cls.work_dir = cls._tmp.name
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._tmp.cleanup()
+
+    def make_test_dir(self) -> str:
+        """Create an isolated directory for a test that writes into its work dir."""
+        path = Path(self._tmp.name, self.id())
+        path.mkdir()
+        return str(path)
+
+
+class SharedClientTestCase(SharedWorkDirTestCase):
+    """Base class for route tests, all served by the module's one UI app and TestClient."""
+
+    def setUp(self):
+        self.ui = _shared_ui
+        self.client = _shared_client
+
+        # The lifespan state is copied into every request, so per-test values are set here
+        self.tasks = self.client.app_state["tasks"]
+        self.tasks.clear()
+        running_executors.clear()
+        self.client.app_state["work_dir"] = self.work_dir
+
+
+class TestUIInitialization(SharedWorkDirTestCase):
     """Tests for UI class initialization."""
 
     def setUp(self):
         self.db_path = ":memory:"  # Use in-memory database for testing
-        self.work_dir = tempfile.mkdtemp()
 
     def test_ui_initialization(self):
         """Test that UI initializes with correct components."""
@@ -41,14 +160,14 @@ class TestUIInitialization(unittest.TestCase):
         self.assertEqual(len(ui.tasks), 0)
 
 
-class TestUIRoutesConfig(unittest.TestCase):
+class TestUIRoutesConfig(SharedClientTestCase):
     """Tests for configuration-related routes."""
 
     def setUp(self):
-        self.db_path = ":memory:"
-        self.work_dir = tempfile.mkdtemp()
-        self.ui = UI(db_path=self.db_path, work_dir=self.work_dir)
-        self.client = TestClient(self.ui.app)
+        super().setUp()
+        # Start every test from just the one test config item
+        for item in profile_manager.config_db.get_info_items():
+            profile_manager.config_db.delete_item(item.id)
 
         # Create a test config item
         self.test_item = InfoItem(
@@ -57,7 +176,8 @@ class TestUIRoutesConfig(unittest.TestCase):
             describe="Test Description",
             data_type="str",
             sort_no=1,
-            sample_col_name="test_sample"
+            sample_col_name="test_sample",
+            profile_id=1
         )
         
         self.created_id = profile_manager.config_db.add_item(self.test_item)
@@ -75,7 +195,7 @@ class TestUIRoutesConfig(unittest.TestCase):
 
     def test_get_info_items_error(self):
         """Test error handling in get_info_items."""
-        with patch.object(profile_manager.config_db, 'get_info_items', side_effect=Exception("Database error")):
+        with patch.object(profile_manager.config_db, 'get_info_item_rows', side_effect=Exception("Database error")):
             response = self.client.get("/config/info_item")
             
         self.assertEqual(response.status_code, 500)
@@ -108,8 +228,8 @@ class TestUIRoutesConfig(unittest.TestCase):
         
         response = self.client.post("/config/info_item", json=incomplete_data)
         
-        self.assertEqual(response.status_code, 400)
-        self.assertIn("error", response.json())
+        self.assertEqual(response.status_code, 422)
+        self.assertIn("detail", response.json())
 
     def test_update_info_item_success(self):
         """Test updating an existing info item."""
@@ -150,8 +270,8 @@ class TestUIRoutesConfig(unittest.TestCase):
         
         response = self.client.put(f"/config/info_item/{self.created_id}", json=update_data)
         
-        self.assertEqual(response.status_code, 400)
-        self.assertIn("error", response.json())
+        self.assertEqual(response.status_code, 422)
+        self.assertIn("detail", response.json())
 
     def test_delete_info_item_success(self):
         """Test deleting an existing info item."""
@@ -174,10 +294,10 @@ class TestUIRoutesConfig(unittest.TestCase):
     def test_update_sort_order_success(self):
         """Test updating the sort order of info items."""
         # Create additional items to sort
-        item2 = InfoItem(id=0, label="Item 2", data_type="str", sort_no=2, describe="", sample_col_name="")
-        item3 = InfoItem(id=0, label="Item 3", data_type="str", sort_no=3, describe="object3", sample_col_name="obj3")
-        id2 = profile_manager.config_db.add_item(item2)
-        id3 = profile_manager.config_db.add_item(item3)
+        item2 = InfoItem(id=0, label="Item 2", data_type="str", sort_no=2, describe="", sample_col_name="", profile_id=1)
+        item3 = InfoItem(id=0, label="Item 3", data_type="str", sort_no=3, describe="object3", sample_col_name="obj3",
+                         profile_id=1)
+        id2, id3 = profile_manager.config_db.add_items([item2, item3])
         
         sort_data = {
             "items": [
@@ -210,19 +330,13 @@ class TestUIRoutesConfig(unittest.TestCase):
         
         response = self.client.post("/config/info_item/sort", json=sort_data)
         
-        self.assertEqual(response.status_code, 400)
-        self.assertIn("error", response.json())
+        self.assertEqual(response.status_code, 422)
+        self.assertIn("detail", response.json())
 
 
-class TestUIRoutesMain(unittest.TestCase):
+class TestUIRoutesMain(SharedClientTestCase):
     """Tests for main UI routes."""
 
-    def setUp(self):
-        self.db_path = ":memory:"
-        self.work_dir = tempfile.mkdtemp()
-        self.ui = UI(db_path=self.db_path, work_dir=self.work_dir)
-        self.client = TestClient(self.ui.app)
-
     def test_serve_config_ui(self):
         """Test serving the config UI page."""
         response = self.client.get("/config/info_item_ui")
@@ -253,28 +367,18 @@ class TestUIRoutesMain(unittest.TestCase):
 
     def test_favicon(self):
         """Test favicon endpoint."""
-        # Create a mock favicon file for testing
+        # The shipped favicon is read once when the UI is built, so it is served from memory
         favicon_path = Path(self.ui.template_dir) / "favicon.png"
-        favicon_path.touch()  # Create an empty file
         
-        try:
-            response = self.client.get("/favicon.ico")
-            self.assertEqual(response.status_code, 200)
-        finally:
-            # Clean up
-            if favicon_path.exists():
-                favicon_path.unlink()
+        response = self.client.get("/favicon.ico")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["content-type"], "image/png")
+        self.assertEqual(response.content, favicon_path.read_bytes())
 
 
-class TestUIRoutesWorkingDirectory(unittest.TestCase):
+class TestUIRoutesWorkingDirectory(SharedClientTestCase):
     """Tests for working directory routes."""
 
-    def setUp(self):
-        self.db_path = ":memory:"
-        self.work_dir = tempfile.mkdtemp()
-        self.ui = UI(db_path=self.db_path, work_dir=self.work_dir)
-        self.client = TestClient(self.ui.app)
-
     def test_get_working_directory(self):
         """Test getting the current working directory."""
         response = self.client.get("/api/working-directory")
@@ -285,7 +389,7 @@ class TestUIRoutesWorkingDirectory(unittest.TestCase):
 
     def test_set_working_directory_success(self):
         """Test setting a new working directory."""
-        new_work_dir = tempfile.mkdtemp()
+        new_work_dir = tempfile.mkdtemp(dir=self.work_dir)
         request_data = {"path": new_work_dir}
         
         response = self.client.post("/api/working-directory", json=request_data)
@@ -307,7 +411,7 @@ class TestUIRoutesWorkingDirectory(unittest.TestCase):
         """Test error handling when setting working directory."""
         with patch('os.path.exists', return_value=True), \
              patch('os.path.isdir', return_value=True):
-            with patch.object(Path, 'resolve', side_effect=Exception("Path error")):
+            with patch('os.path.realpath', side_effect=Exception("Path error")):
                 request_data = {"path": "/some/valid/path"}
                 response = self.client.post("/api/working-directory", json=request_data)
                 
@@ -315,18 +419,17 @@ class TestUIRoutesWorkingDirectory(unittest.TestCase):
                 self.assertIn("error", response.json())
 
 
-class TestUIRoutesFileBrowsing(unittest.TestCase):
+class TestUIRoutesFileBrowsing(SharedClientTestCase):
     """Tests for file browsing routes."""
 
     def setUp(self):
-        self.db_path = ":memory:"
-        self.work_dir = tempfile.mkdtemp()
-        self.ui = UI(db_path=self.db_path, work_dir=self.work_dir)
-        self.client = TestClient(self.ui.app)
+        # These tests write files, so each gets its own dir under the class tmpdir
+        self.work_dir = self.make_test_dir()
+        super().setUp()
 
         # Create test files and directory structure
         self.test_file = Path(self.work_dir) / "test.eml"
-        self.test_file.write_text("test content")
+        write_fixture(self.test_file, b"test content")
         self.test_dir = Path(self.work_dir) / "test_subdir"
         self.test_dir.mkdir()
 
@@ -370,7 +473,7 @@ class TestUIRoutesFileBrowsing(unittest.TestCase):
     def test_get_directory_contents_access_denied(self):
         """Test getting directory contents with path outside allowed boundaries."""
         # Try to access a path outside the working directory
-        outside_path = tempfile.mkdtemp()
+        outside_path = tempfile.mkdtemp(dir=self._tmp.name)
         response = self.client.get(f"/api/files?path={outside_path}")
         
         # This should be denied if our security check works properly
@@ -381,19 +484,19 @@ class TestUIRoutesFileBrowsing(unittest.TestCase):
         # The actual result depends on the implementation in the API
         # If the path is outside the allowed boundaries, it should return 403
         # This is tested by patching the Path.relative_to method to raise ValueError
+        # The working directory itself is always allowed, so check one of its subdirs
         with patch.object(Path, 'is_relative_to', return_value=False):
-            response = self.client.get(f"/api/files?path={self.work_dir}")
+            response = self.client.get(f"/api/files?path={self.test_dir}")
             self.assertEqual(response.status_code, 403)
 
 
-class TestUIRoutesTaskManagement(unittest.TestCase):
+class TestUIRoutesTaskManagement(SharedClientTestCase):
     """Tests for task management routes."""
 
     def setUp(self):
-        self.db_path = ":memory:"
-        self.work_dir = tempfile.mkdtemp()
-        self.ui = UI(db_path=self.db_path, work_dir=self.work_dir)
-        self.client = TestClient(self.ui.app)
+        # These tests write files, so each gets its own dir under the class tmpdir
+        self.work_dir = self.make_test_dir()
+        super().setUp()
 
     def test_get_tasks_empty(self):
         """Test getting tasks when none exist."""
@@ -405,30 +508,26 @@ class TestUIRoutesTaskManagement(unittest.TestCase):
 
     def test_create_task_stream(self):
         """Test creating a task via streaming endpoint."""
-        # Mock the executor to avoid actual processing
-        with patch('src.info_extract.executor.Executor') as mock_executor_class:
-            # Create a mock executor instance
-            mock_executor = MagicMock()
-            mock_executor.destination_dir = self.work_dir
-            mock_executor.run = AsyncMock(return_value=asyncio.StreamReader())
-            mock_executor_class.return_value = mock_executor
-            mock_executor_class.return_value.destination_dir = self.work_dir
-            
-            # Create a temporary file for processing
-            test_file = Path(self.work_dir) / "test.eml"
-            test_file.write_text("test content")
-            
-            request_data = {
-                "working_directory": self.work_dir,
-                "files": [str(test_file)]
-            }
-            
-            response = self.client.post("/api/tasks/stream", json=request_data)
-            
-            # The streaming endpoint should return 200 with streaming content
-            self.assertEqual(response.status_code, 200)
-            # Check if content type is text/plain for streaming
-            self.assertIn("text/plain", response.headers["content-type"])
+        # The module-level MockExecutor stands in for the pipeline
+        MockExecutor.return_value.destination_dir = self.work_dir
+        
+        # Create a temporary file for processing
+        test_file = Path(self.work_dir) / "test.eml"
+        write_fixture(test_file, b"test content")
+        
+        request_data = {
+            "working_directory": self.work_dir,
+            "files": [str(test_file)]
+        }
+        
+        response = self.client.post("/api/tasks/stream", json=request_data)
+        
+        # The streaming endpoint should return 200 with streaming content
+        self.assertEqual(response.status_code, 200)
+        # Check if content type is text/event-stream for streaming
+        self.assertIn("text/event-stream", response.headers["content-type"])
+        # Progress frames are never gzip-buffered
+        self.assertNotIn("content-encoding", response.headers)
 
     def test_get_specific_task(self):
         """Test getting a specific task."""
@@ -445,7 +544,7 @@ class TestUIRoutesTaskManagement(unittest.TestCase):
             'result_files': [],
             'files': []
         }
-        self.ui.tasks[task_id] = task_data
+        self.tasks[task_id] = task_data
         
         response = self.client.get(f"/api/tasks/{task_id}")
         
@@ -475,7 +574,7 @@ class TestUIRoutesTaskManagement(unittest.TestCase):
             'result_files': [],
             'files': []
         }
-        self.ui.tasks[task_id] = task_data
+        self.tasks[task_id] = task_data
         
         response = self.client.post(f"/api/tasks/{task_id}/cancel")
         
@@ -498,7 +597,7 @@ class TestUIRoutesTaskManagement(unittest.TestCase):
             'result_files': [],
             'files': []
         }
-        self.ui.tasks[task_id] = task_data
+        self.tasks[task_id] = task_data
         
         response = self.client.post(f"/api/tasks/{task_id}/cancel")
         
@@ -514,9 +613,6 @@ class TestUIRoutesTaskManagement(unittest.TestCase):
 
     def test_cancel_running_task_with_executor(self):
         """Test canceling a running task with actual executor cancellation."""
-        import threading
-        import time
-        
         task_id = "test-task-id"
         task_data = {
             'id': task_id,
@@ -529,12 +625,12 @@ class TestUIRoutesTaskManagement(unittest.TestCase):
             'result_files': [],
             'files': []
         }
-        self.ui.tasks[task_id] = task_data
+        self.tasks[task_id] = task_data
         
         # Create a mock executor and cancellation event
         mock_executor = MagicMock()
-        cancellation_event = threading.Event()
-        self.ui.running_executors[task_id] = (mock_executor, cancellation_event)
+        cancellation_event = asyncio.Event()
+        running_executors[task_id] = (mock_executor, cancellation_event)
         
         # Verify cancellation event is not set initially
         self.assertFalse(cancellation_event.is_set())
@@ -552,21 +648,20 @@ class TestUIRoutesTaskManagement(unittest.TestCase):
         self.assertTrue(cancellation_event.is_set())
         
         # Verify task was removed from running_executors
-        self.assertNotIn(task_id, self.ui.running_executors)
+        self.assertNotIn(task_id, running_executors)
 
 
-class TestUIRoutesResults(unittest.TestCase):
+class TestUIRoutesResults(SharedClientTestCase):
     """Tests for results routes."""
 
     def setUp(self):
-        self.db_path = ":memory:"
-        self.work_dir = tempfile.mkdtemp()
-        self.ui = UI(db_path=self.db_path, work_dir=self.work_dir)
-        self.client = TestClient(self.ui.app)
+        # These tests write files, so each gets its own dir under the class tmpdir
+        self.work_dir = self.make_test_dir()
+        super().setUp()
 
         # Create a test result file
         self.result_file = Path(self.work_dir) / "test_result.xlsx"
-        self.result_file.write_text("test result content")
+        write_fixture(self.result_file, b"test result content")
 
         # Create a task that generated the result file
         self.task_id = "test-task-id"
@@ -581,7 +676,7 @@ class TestUIRoutesResults(unittest.TestCase):
             'result_files': ["test_result.xlsx"],
             'files': []
         }
-        self.ui.tasks[self.task_id] = self.task_data
+        self.tasks[self.task_id] = self.task_data
 
     def test_get_result_file_success(self):
         """Test downloading a result file."""
@@ -590,6 +685,23 @@ class TestUIRoutesResults(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertIn("test result content", response.text)
 
+    def test_get_result_file_from_task_result_dir(self):
+        """Test that each task's result file is served from that task's own directory."""
+        other_dir = Path(self.work_dir) / "other_output"
+        other_dir.mkdir()
+        write_fixture(other_dir / "test_result.xlsx", b"newer task content")
+        self.tasks["newer-task-id"] = {**self.task_data, 'id': "newer-task-id", 'result_dir': str(other_dir)}
+
+        response = self.client.get("/api/results/test_result.xlsx")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("newer task content", response.text)
+
+        # Once the newer task is gone the older task's file is served again
+        del self.tasks["newer-task-id"]
+        response = self.client.get("/api/results/test_result.xlsx")
+        self.assertIn("test result content", response.text)
+
     def test_get_result_file_invalid_filename(self):
         """Test downloading a result file with invalid path (path traversal)."""
         # Attempt path traversal
@@ -623,31 +735,32 @@ class TestUIRunMethod(unittest.TestCase):
         """Test that run method correctly calls uvicorn."""
         ui = UI()
         
-        # Mock uvicorn.run to avoid actually starting the server
-        with patch('uvicorn.run') as mock_run:
-            ui.run()
-            
-            # Verify that uvicorn.run was called with correct parameters
-            mock_run.assert_called_once()
-            args, kwargs = mock_run.call_args
-            self.assertEqual(args[0], ui.app)
-            self.assertEqual(kwargs["host"], ui._host)
-            self.assertEqual(kwargs["port"], ui._port)
+        # uvicorn is the module-level mock, so nothing is actually started
+        mock_run = sys.modules["uvicorn"].run
+        mock_run.reset_mock()
+        ui.run()
+        
+        # Verify that uvicorn.run was called with correct parameters
+        mock_run.assert_called_once()
+        args, kwargs = mock_run.call_args
+        self.assertEqual(args[0], ui.app)
+        self.assertEqual(kwargs["host"], ui._host)
+        self.assertEqual(kwargs["port"], ui._port)
 
 
-class TestUICORSConfiguration(unittest.TestCase):
+class TestUICORSConfiguration(SharedWorkDirTestCase):
     """Tests for CORS configuration."""
 
-    def setUp(self):
-        self.db_path = ":memory:"
-        self.work_dir = tempfile.mkdtemp()
-        self.ui = UI(db_path=self.db_path, work_dir=self.work_dir)
-        self.client = TestClient(self.ui.app)
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.ui = UI(db_path=":memory:", work_dir=cls.work_dir)
+        cls.client = TestClient(cls.ui.app)
 
     def test_cors_headers(self):
         """Test that CORS headers are properly set."""
         # Make a request with origin header to check CORS
-        headers = {"Origin": "http://example.com"}
+        headers = {"Origin": "http://127.0.0.1:5000"}
         response = self.client.get("/", headers=headers)
         
         # Check if CORS headers are present